@@ -3,19 +3,129 @@ AI-Powered Financial Data Extractor using OpenAI
 Extracts financial data from HTML/Markdown tables using GPT models
 """
 import os
+import mmap
 import logging
-import json
+import time
+import hashlib
+import tempfile
+import re
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import orjson
+import tiktoken
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
 _log = logging.getLogger(__name__)
 
+# Transient OpenAI failures worth retrying (429s, 5xx, network errors/timeouts)
+_RETRYABLE_OPENAI_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,
+)
+_MAX_RETRY_WAIT = 60.0
+_exponential_wait = wait_exponential_jitter(initial=1, max=_MAX_RETRY_WAIT)
+
+
+def _wait_retry_after(retry_state) -> float:
+    """Wait as long as the server's Retry-After header asks, else back off exponentially with jitter."""
+    response = getattr(retry_state.outcome.exception(), 'response', None)
+    if response is not None:
+        headers = response.headers
+        try:
+            if headers.get('retry-after-ms'):
+                return min(float(headers['retry-after-ms']) / 1000, _MAX_RETRY_WAIT)
+            if headers.get('retry-after'):
+                return min(float(headers['retry-after']), _MAX_RETRY_WAIT)
+        except ValueError:
+            pass  # HTTP-date form; fall back to exponential backoff
+    return _exponential_wait(retry_state)
+
+
+_openai_retry = retry(
+    retry=retry_if_exception_type(_RETRYABLE_OPENAI_ERRORS),
+    wait=_wait_retry_after,
+    stop=stop_after_attempt(6),
+    before_sleep=before_sleep_log(_log, logging.WARNING),
+    reraise=True
+)
+
+class RateBudget:
+    """
+    Per-minute request (RPM) and token (TPM) budget for OpenAI calls.
+    
+    Callers await acquire() (or call acquire_blocking() from synchronous
+    code) before each request; it waits until both the number of requests
+    and the estimated tokens sent in the last period leave room. Running just under the account's limits gives steadier
+    throughput than bursting into 429s and backing off. State is guarded
+    by a thread lock, so one budget can be shared by every request thread
+    and event loop in the process.
+    """
+    
+    def __init__(self, rpm: int, tpm: int, period: float = 60.0, utilization: float = 0.95):
+        """
+        Args:
+            rpm: Requests per minute allowed for the account/model
+            tpm: Tokens per minute allowed for the account/model
+            period: Window length in seconds
+            utilization: Fraction of the limits to actually use
+        """
+        self.rpm = max(1, int(rpm * utilization))
+        self.tpm = max(1, int(tpm * utilization))
+        self.period = period
+        self._sent = deque()  # (monotonic time, tokens) per request in the window
+        self._tokens = 0
+        self._lock = threading.Lock()
+    
+    def _try_reserve(self, tokens: int) -> Optional[float]:
+        """Reserve a request of `tokens` tokens if it fits; otherwise return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            while self._sent and now - self._sent[0][0] >= self.period:
+                self._tokens -= self._sent.popleft()[1]
+            if len(self._sent) < self.rpm and self._tokens + tokens <= self.tpm:
+                self._sent.append((now, tokens))
+                self._tokens += tokens
+                return None
+            return self.period - (now - self._sent[0][0])
+    
+    async def acquire(self, tokens: int) -> None:
+        """Wait until a request of about `tokens` tokens fits in the budget, then reserve it."""
+        tokens = min(tokens, self.tpm)
+        while (wait := self._try_reserve(tokens)) is not None:
+            await asyncio.sleep(wait)
+    
+    def acquire_blocking(self, tokens: int) -> None:
+        """Like acquire(), but sleeps the calling thread (for the synchronous client)."""
+        tokens = min(tokens, self.tpm)
+        while (wait := self._try_reserve(tokens)) is not None:
+            time.sleep(wait)
+
+
+# Regexes used to compact table markup before it is sent to the model
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_HTML_TAG_RE = re.compile(r'<(\w+)(\s[^>]*)>')
+_HTML_KEPT_ATTR_RE = re.compile(r'\s(colspan|rowspan)\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+)', re.I)
+_HTML_INTER_TAG_WS_RE = re.compile(r'>\s+<')
+_WHITESPACE_RE = re.compile(r'\s+')
+_MD_PADDING_RE = re.compile(r' {2,}')
+_MD_RULE_RE = re.compile(r'-{4,}')
+
 
 class AIFinancialExtractor:
     """Extract financial data from parsed documents using OpenAI."""
@@ -75,18 +185,18 @@ Return ONLY a valid JSON object:
     {
       "particular": "Sale of goods",
       "key": "sale_of_goods",
-      "values": {
-        "30.06.2025": "4,357.64",
-        "31.03.2025": "4,218.90",
-        "30.06.2024": "3,967.38",
-        "31.03.2025_Y": "16,859.22"
-      }
+      "values": [
+        {"period": "30.06.2025", "value": "4,357.64"},
+        {"period": "31.03.2025", "value": "4,218.90"},
+        {"period": "30.06.2024", "value": "3,967.38"},
+        {"period": "31.03.2025_Y", "value": "16,859.22"}
+      ]
     }
   ]
 }
 
 CRITICAL RULES:
-- Extract EVERY ROW from the table - do NOT skip any rows
+- Extract EVERY ROW from the table that matches one of the keys above - do NOT skip any rows
 - Extract ALL PERIODS/COLUMNS - do not skip any date columns
 - Use standard date formats: DD.MM.YYYY (e.g., "30.06.2025")
 - For yearly/annual periods (look for "YEAR ENDED", "FY", "12M" headers), append "_Y" suffix (e.g., "31.03.2025_Y")
@@ -102,180 +212,895 @@ CRITICAL RULES:
 
 Extract all financial metrics with values for all available periods. Return ONLY the JSON object, no additional text."""
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    # Keys the model may assign to rows (parsed from SYSTEM_PROMPT so both stay in sync)
+    FINANCIAL_KEYS = tuple(re.findall(r'\(key: "(\w+)"\)', SYSTEM_PROMPT))
+
+    # Structured Outputs schema: the API guarantees responses match it, so no
+    # fence stripping or per-item validation is needed. Strict mode does not
+    # allow free-form objects, so period values come back as a list and are
+    # converted to the {period: value} mapping in _parse_response.
+    RESPONSE_FORMAT = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "FinancialExtraction",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "company_name": {"type": "string"},
+                    "financial_data": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "particular": {"type": "string"},
+                                "key": {"type": "string", "enum": list(FINANCIAL_KEYS)},
+                                "values": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "period": {"type": "string"},
+                                            "value": {"type": "string"}
+                                        },
+                                        "required": ["period", "value"],
+                                        "additionalProperties": False
+                                    }
+                                }
+                            },
+                            "required": ["particular", "key", "values"],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["company_name", "financial_data"],
+                "additionalProperties": False
+            }
+        }
+    }
+
+    # Token budget for table content in the user prompt
+    MAX_CONTENT_TOKENS = 7500
+    
+    # Output allowance added to the prompt estimate when reserving rate budget
+    EXPECTED_OUTPUT_TOKENS = 2000
+    
+    # Table files are read at most this far. Compaction typically shrinks
+    # docling HTML several-fold before the token budget applies, so the cap
+    # sits well above what can reach the prompt.
+    MAX_READ_BYTES = 512 * 1024
+    
+    # Primary-model extractions with fewer rows than this are redone on the fallback
+    # model. Kept well below len(FINANCIAL_KEYS): some companies' statements
+    # legitimately map only a dozen or so rows, so only a near-empty result counts.
+    MIN_FINANCIAL_ITEMS = len(FINANCIAL_KEYS) // 8
+    
+    # OpenAI caches prompt prefixes of 1024+ tokens. SYSTEM_PROMPT and
+    # RESPONSE_FORMAT are constants (~1.2k tokens together) sent ahead of the
+    # per-document user message, so every request shares the same prefix;
+    # the cache key routes them to the same cache shard.
+    PROMPT_CACHE_KEY = "financial-extraction-v1"
+
+    # OpenAI Batch API settings (bulk extraction at half price, 24h window)
+    BATCH_ENDPOINT = "/v1/chat/completions"
+    BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+    # Seconds between cache prunes triggered by cache writes
+    CACHE_PRUNE_INTERVAL = 3600
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini",
+                 cache_dir: Optional[Path] = Path(".ai_cache"),
+                 cache_max_age_days: Optional[float] = 30,
+                 fallback_model: Optional[str] = None,
+                 rate_budget: Optional[RateBudget] = None):
         """
         Initialize AI extractor.
         
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
-            model: OpenAI model to use (default: gpt-4o-mini for cost efficiency)
+            model: Primary OpenAI model (default: gpt-4o-mini for cost efficiency)
+            cache_dir: Directory for cached extraction responses (None disables caching)
+            cache_max_age_days: Delete cached responses not used for this many days
+                (None keeps them forever)
+            fallback_model: Model used when the primary extraction is invalid or
+                nearly empty (default: None, no fallback)
+            rate_budget: RPM/TPM budget applied to every OpenAI request, sync and
+                async (None for no limit)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable.")
         
         self.client = OpenAI(api_key=self.api_key)
+        # Chat completions are retried by _openai_retry (Retry-After aware) instead of the SDK
+        self._completion_client = self.client.with_options(max_retries=0)
         self.model = model
-        _log.info(f"Initialized AIFinancialExtractor with model: {model}")
+        self.fallback_model = fallback_model
+        self.rate_budget = rate_budget
+        self._system_message = {"role": "system", "content": self.SYSTEM_PROMPT}
+        self._encoding = None  # tiktoken encoding, loaded on first use (False if unavailable)
+        # Event loop thread and AsyncOpenAI client for extract_many_blocking, started on first use
+        self._loop = None
+        self._loop_pid = None
+        self._aclient = None
+        self._loop_lock = threading.Lock()
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.cache_max_age_days = cache_max_age_days
+        self._last_cache_prune = 0.0
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.prune_cache()
+        _log.info(f"Initialized AIFinancialExtractor with model: {model} (fallback: {fallback_model})")
     
-    def _read_file_content(self, file_path: Path) -> str:
-        """Read content from HTML or Markdown file."""
+    def _read_file_content(self, file_path: Path, max_bytes: Optional[int] = None) -> str:
+        """
+        Read content from HTML or Markdown file.
+        
+        The file is memory-mapped and only the first max_bytes are decoded,
+        so oversized tables are cut before any decode work is spent on them.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return ""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if max_bytes is None or size <= max_bytes:
+                        return mm[:].decode('utf-8')
+                    
+                    # Back off to the start of a character so a multi-byte
+                    # UTF-8 sequence is not split at the cut
+                    end = max_bytes
+                    while end > 0 and (mm[end] & 0xC0) == 0x80:
+                        end -= 1
+                    _log.warning(f"{file_path.name}: read truncated from {size} to {end} bytes")
+                    return mm[:end].decode('utf-8')
         except Exception as e:
             _log.error(f"Error reading file {file_path}: {str(e)}")
             raise
     
-    def _clean_json_response(self, response: str) -> str:
-        """Clean OpenAI response to extract valid JSON."""
-        # Remove markdown code blocks if present
-        response = response.strip()
-        if response.startswith('```json'):
-            response = response[7:]
-        elif response.startswith('```'):
-            response = response[3:]
-        if response.endswith('```'):
-            response = response[:-3]
-        return response.strip()
+    def _cache_key(self, request_body: Dict) -> str:
+        """Hash everything that influences the model output (model, prompts, content)."""
+        payload = orjson.dumps(request_body, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _load_cached(self, cache_key: str) -> Optional[Dict]:
+        """Return cached extraction for the key, or None on miss."""
+        if self.cache_dir is None:
+            return None
+        
+        cache_file = self.cache_dir / f"{cache_key}.json"
+        if not cache_file.exists():
+            return None
+        
+        try:
+            with open(cache_file, 'rb') as f:
+                data = orjson.loads(f.read())
+        except Exception as e:
+            _log.warning(f"Ignoring unreadable cache entry {cache_file}: {e}")
+            return None
+        
+        # Entries age from their last use, not their creation
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        return data
+    
+    def _store_cached(self, cache_key: str, data: Dict) -> None:
+        """Write extraction to the cache atomically (temp file + os.replace)."""
+        if self.cache_dir is None:
+            return
+        
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data))
+            os.replace(tmp_path, self.cache_dir / f"{cache_key}.json")
+        except Exception as e:
+            _log.warning(f"Failed to write cache entry {cache_key}: {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+        
+        if time.monotonic() - self._last_cache_prune >= self.CACHE_PRUNE_INTERVAL:
+            self.prune_cache()
     
-    def extract_from_html(self, html_path: Path, company_name: str) -> Dict:
+    def prune_cache(self) -> int:
+        """
+        Delete cache entries (and stray temp files) not used within cache_max_age_days.
+        
+        Runs when the extractor is created and then at most once per
+        CACHE_PRUNE_INTERVAL, after a cache write.
+        
+        Returns:
+            Number of files deleted
+        """
+        self._last_cache_prune = time.monotonic()
+        if self.cache_dir is None or self.cache_max_age_days is None:
+            return 0
+        
+        cutoff = time.time() - self.cache_max_age_days * 86400
+        deleted = 0
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
+                            deleted += 1
+                    except FileNotFoundError:
+                        continue  # removed by another worker
+        except OSError as e:
+            _log.warning(f"Failed to prune cache {self.cache_dir}: {e}")
+        
+        if deleted:
+            _log.info(f"Pruned {deleted} cache entries older than {self.cache_max_age_days} days")
+        return deleted
+    
+    def extract_from_html(self, html_path: Path, company_name: str, force_refresh: bool = False) -> Dict:
         """
         Extract financial data from HTML table.
         
         Args:
             html_path: Path to HTML file containing financial table
             company_name: Company name for context
+            force_refresh: Bypass the response cache and call the API
         
         Returns:
             Dictionary with extracted financial data
         """
-        content = self._read_file_content(html_path)
-        return self._extract_with_openai(content, company_name, "HTML")
+        content = self._read_file_content(html_path, self.MAX_READ_BYTES)
+        return self._extract_with_openai(content, company_name, "HTML", force_refresh=force_refresh)
     
-    def extract_from_markdown(self, md_path: Path, company_name: str) -> Dict:
+    def extract_from_markdown(self, md_path: Path, company_name: str, force_refresh: bool = False) -> Dict:
         """
         Extract financial data from Markdown table.
         
         Args:
             md_path: Path to Markdown file containing financial table
             company_name: Company name for context
+            force_refresh: Bypass the response cache and call the API
         
         Returns:
             Dictionary with extracted financial data
         """
-        content = self._read_file_content(md_path)
-        return self._extract_with_openai(content, company_name, "Markdown")
+        content = self._read_file_content(md_path, self.MAX_READ_BYTES)
+        return self._extract_with_openai(content, company_name, "Markdown", force_refresh=force_refresh)
     
-    def extract_from_output_dir(self, output_dir: Path, company_name: str, 
-                                preferred_format: str = "html") -> Dict:
+    def find_table_file(self, output_dir: Path, preferred_format: str = "html") -> Tuple[Path, str]:
         """
-        Extract financial data from output directory (tries multiple formats).
+        Locate the table file to extract from in a parsed output directory.
         
         Args:
             output_dir: Directory containing parsed output files
-            company_name: Company name
             preferred_format: Preferred format to try first ("html" or "markdown")
         
         Returns:
-            Dictionary with extracted financial data
+            Tuple of (file_path, format_type) where format_type is "HTML" or "Markdown"
         """
+        # One directory pass; keep the first *-table-*.html / *-table-*.md seen
+        html_file = md_file = None
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if '-table-' not in name or name.startswith('.'):
+                    continue
+                if html_file is None and name.endswith('.html'):
+                    html_file = Path(entry.path)
+                elif md_file is None and name.endswith('.md'):
+                    md_file = Path(entry.path)
+        
         # Try preferred format first
-        if preferred_format == "html":
-            html_files = list(output_dir.glob("*-table-*.html"))
-            if html_files:
-                _log.info(f"Using HTML file: {html_files[0]}")
-                return self.extract_from_html(html_files[0], company_name)
+        if preferred_format == "html" and html_file:
+            _log.info(f"Using HTML file: {html_file}")
+            return html_file, "HTML"
         
         # Try markdown as fallback
-        md_files = list(output_dir.glob("*-table-*.md"))
-        if md_files:
-            _log.info(f"Using Markdown file: {md_files[0]}")
-            return self.extract_from_markdown(md_files[0], company_name)
+        if md_file:
+            _log.info(f"Using Markdown file: {md_file}")
+            return md_file, "Markdown"
         
         # Try HTML if markdown was preferred but not found
-        if preferred_format == "markdown":
-            html_files = list(output_dir.glob("*-table-*.html"))
-            if html_files:
-                _log.info(f"Falling back to HTML file: {html_files[0]}")
-                return self.extract_from_html(html_files[0], company_name)
+        if preferred_format == "markdown" and html_file:
+            _log.info(f"Falling back to HTML file: {html_file}")
+            return html_file, "HTML"
         
         raise FileNotFoundError(f"No suitable table files found in {output_dir}")
     
-    def _extract_with_openai(self, content: str, company_name: str, format_type: str) -> Dict:
+    def extract_from_output_dir(self, output_dir: Path, company_name: str, 
+                                preferred_format: str = "html", force_refresh: bool = False) -> Dict:
+        """
+        Extract financial data from output directory (tries multiple formats).
+        
+        Args:
+            output_dir: Directory containing parsed output files
+            company_name: Company name
+            preferred_format: Preferred format to try first ("html" or "markdown")
+            force_refresh: Bypass the response cache and call the API
+        
+        Returns:
+            Dictionary with extracted financial data
+        """
+        file_path, format_type = self.find_table_file(output_dir, preferred_format)
+        if format_type == "HTML":
+            return self.extract_from_html(file_path, company_name, force_refresh=force_refresh)
+        return self.extract_from_markdown(file_path, company_name, force_refresh=force_refresh)
+    
+    def _get_encoding(self):
+        """
+        Return the tiktoken encoding for the model, or None if it cannot be loaded.
+        
+        tiktoken downloads its BPE ranks on first use, so a failure here falls
+        back to a character-based budget instead of breaking extraction.
+        """
+        if self._encoding is None:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                _log.warning(f"tiktoken encoding unavailable, using character budget: {e}")
+                self._encoding = False
+        return self._encoding or None
+    
+    def _compact_content(self, content: str, format_type: str) -> str:
+        """
+        Remove markup that costs tokens without carrying table data.
+        
+        HTML keeps only colspan/rowspan attributes (needed to align values
+        with period columns) and drops comments and whitespace; Markdown has
+        its column padding collapsed. Empty cells are kept so columns stay aligned.
+        """
+        if format_type == "HTML":
+            content = _HTML_COMMENT_RE.sub('', content)
+            content = _HTML_TAG_RE.sub(
+                lambda m: '<' + m.group(1) + ''.join(
+                    f' {attr.group(1).lower()}={attr.group(2)}'
+                    for attr in _HTML_KEPT_ATTR_RE.finditer(m.group(2))
+                ) + '>',
+                content
+            )
+            content = _HTML_INTER_TAG_WS_RE.sub('><', content)
+            return _WHITESPACE_RE.sub(' ', content).strip()
+        
+        content = _MD_RULE_RE.sub('---', content)
+        return _MD_PADDING_RE.sub(' ', content).strip()
+    
+    def _build_request_body(self, content: str, company_name: str, format_type: str,
+                            model: Optional[str] = None) -> Dict:
+        """
+        Build the chat completion request body for an extraction.
+        
+        Shared by the synchronous path and the Batch API path so both send
+        identical prompts.
+        """
+        content = self._compact_content(content, format_type)
+        
+        # Truncate content on a token budget (to stay within token limits)
+        encoding = self._get_encoding()
+        if encoding is not None:
+            tokens = encoding.encode(content)
+            _log.info(f"{format_type} content: {len(content)} chars, {len(tokens)} tokens")
+            if len(tokens) > self.MAX_CONTENT_TOKENS:
+                content = encoding.decode(tokens[:self.MAX_CONTENT_TOKENS])
+                _log.warning(f"Content truncated from {len(tokens)} to {self.MAX_CONTENT_TOKENS} tokens "
+                             f"({len(content)} chars)")
+        else:
+            max_content_length = self.MAX_CONTENT_TOKENS * 4  # ~4 chars per token
+            if len(content) > max_content_length:
+                _log.warning(f"Content truncated from {len(content)} to {max_content_length} chars")
+                content = content[:max_content_length]
+        
+        user_prompt = self.USER_PROMPT_TEMPLATE.format(
+            format=format_type,
+            company_name=company_name,
+            content=content
+        )
+        
+        return {
+            "model": model or self.model,
+            "messages": [
+                self._system_message,
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.1,  # Low temperature for consistent extraction
+            "response_format": self.RESPONSE_FORMAT,  # Schema-conformant JSON response
+            "prompt_cache_key": self.PROMPT_CACHE_KEY
+        }
+    
+    def _parse_response(self, json_str: str, tokens_used: int, format_type: str,
+                        model: Optional[str] = None, cached_tokens: int = 0) -> Dict:
+        """
+        Parse and validate the JSON content of a chat completion.
+        
+        Args:
+            json_str: Message content returned by the model
+            tokens_used: Total tokens reported by the API
+            format_type: "HTML" or "Markdown"
+            model: Model that produced the response (defaults to the primary model)
+            cached_tokens: Prompt tokens served from OpenAI's prompt cache
+        
+        Returns:
+            Extracted financial data dictionary
+        """
+        if not json_str:
+            raise ValueError("Empty response from OpenAI (request may have been refused)")
+        
+        try:
+            data = orjson.loads(json_str)
+        except orjson.JSONDecodeError as e:
+            _log.error(f"Failed to parse JSON response: {str(e)}")
+            _log.error(f"Raw response: {json_str[:500]}...")
+            raise ValueError(f"Invalid JSON response from OpenAI: {str(e)}")
+        
+        # Validate structure
+        if 'financial_data' not in data:
+            raise ValueError("Response missing 'financial_data' key")
+        
+        # Convert schema's [{period, value}] lists back to {period: value}
+        for item in data['financial_data']:
+            if isinstance(item.get('values'), list):
+                item['values'] = {v['period']: v['value'] for v in item['values']}
+        
+        # Add extraction metadata
+        data['metadata'] = {
+            'extraction_method': 'openai',
+            'model': model or self.model,
+            'tokens_used': tokens_used,
+            'cached_tokens': cached_tokens,
+            'source_format': format_type.lower()
+        }
+        
+        _log.info(f"Successfully extracted {len(data['financial_data'])} financial items")
+        return data
+    
+    @staticmethod
+    def _cached_tokens(usage) -> int:
+        """Prompt tokens served from the prompt cache (usage object or Batch API dict)."""
+        if isinstance(usage, dict):
+            details = usage.get('prompt_tokens_details') or {}
+            return details.get('cached_tokens') or 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        return getattr(details, 'cached_tokens', None) or 0
+    
+    def _collect_stream(self, stream) -> Tuple[str, int, int]:
+        """
+        Accumulate a streamed chat completion.
+        
+        Returns:
+            Tuple of (message_content, total_tokens, cached_tokens)
+        """
+        parts = []
+        tokens_used = 0
+        cached_tokens = 0
+        for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+            if chunk.usage:
+                tokens_used = chunk.usage.total_tokens
+                cached_tokens = self._cached_tokens(chunk.usage)
+        return ''.join(parts), tokens_used, cached_tokens
+    
+    @_openai_retry
+    def _call_openai(self, request_body: Dict) -> Tuple[str, int, int]:
+        """
+        Send one streamed chat completion within the rate budget, retrying
+        transient failures.
+        
+        The stream is consumed inside the retry so errors raised mid-stream
+        are retried too.
+        
+        Returns:
+            Tuple of (message_content, total_tokens, cached_tokens)
+        """
+        if self.rate_budget is not None:
+            self.rate_budget.acquire_blocking(self._estimate_tokens(request_body))
+        
+        # Stream the completion so the response body is consumed as it
+        # arrives instead of after the whole message has been generated
+        stream = self._completion_client.chat.completions.create(
+            **request_body,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        return self._collect_stream(stream)
+    
+    def _needs_fallback(self, data: Dict) -> Optional[str]:
+        """Return why a primary-model extraction should be redone on the fallback model, or None."""
+        try:
+            validate_financial_data(data)
+        except ValueError as e:
+            return str(e)
+        
+        item_count = len(data['financial_data'])
+        if item_count < self.MIN_FINANCIAL_ITEMS:
+            return f"only {item_count} financial items extracted"
+        return None
+    
+    def _extract_with_model(self, content: str, company_name: str, format_type: str,
+                            model: str, force_refresh: bool = False) -> Dict:
+        """
+        Run one extraction on the given model.
+        
+        Responses are cached on disk keyed by a SHA-256 of the full request
+        (model, prompts and content), so re-processing an identical table
+        costs nothing.
+        """
+        request_body = self._build_request_body(content, company_name, format_type, model=model)
+        cache_key = self._cache_key(request_body)
+        
+        if not force_refresh:
+            cached = self._load_cached(cache_key)
+            if cached is not None:
+                _log.info(f"Using cached OpenAI extraction ({cache_key[:12]})")
+                cached.setdefault('metadata', {})['cached'] = True
+                return cached
+        
+        _log.info(f"Sending request to OpenAI ({model})...")
+        
+        json_str, tokens_used, cached_tokens = self._call_openai(request_body)
+        
+        _log.info(f"Received response from OpenAI (tokens used: {tokens_used}, "
+                  f"cached prompt tokens: {cached_tokens})")
+        
+        data = self._parse_response(json_str, tokens_used, format_type, model=model,
+                                    cached_tokens=cached_tokens)
+        
+        self._store_cached(cache_key, data)
+        return data
+    
+    def _extract_with_openai(self, content: str, company_name: str, format_type: str,
+                             force_refresh: bool = False) -> Dict:
         """
         Extract financial data using OpenAI API.
         
+        The cheaper primary model runs first. If its response is invalid or has
+        fewer than MIN_FINANCIAL_ITEMS rows, the same content is re-extracted
+        with the fallback model. metadata['model_tier'] records which was used.
+        
         Args:
             content: HTML or Markdown content
             company_name: Company name
             format_type: "HTML" or "Markdown"
+            force_refresh: Bypass the response cache and call the API
         
         Returns:
             Extracted financial data dictionary
         """
         try:
-            # Truncate content if too long (to stay within token limits)
-            max_content_length = 30000  # ~7500 tokens
-            if len(content) > max_content_length:
-                _log.warning(f"Content truncated from {len(content)} to {max_content_length} chars")
-                content = content[:max_content_length]
-            
-            user_prompt = self.USER_PROMPT_TEMPLATE.format(
-                format=format_type,
-                company_name=company_name,
-                content=content
-            )
-            
-            _log.info(f"Sending request to OpenAI ({self.model})...")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,  # Low temperature for consistent extraction
-                response_format={"type": "json_object"}  # Ensure JSON response
-            )
-            
-            # Extract JSON from response
-            json_str = response.choices[0].message.content
-            json_str = self._clean_json_response(json_str)
-            
-            _log.info(f"Received response from OpenAI (tokens used: {response.usage.total_tokens})")
-            
-            # Parse and validate JSON
-            data = json.loads(json_str)
+            try:
+                data = self._extract_with_model(content, company_name, format_type,
+                                                self.model, force_refresh=force_refresh)
+                fallback_reason = self._needs_fallback(data)
+            except ValueError as e:
+                if not self.fallback_model:
+                    raise
+                fallback_reason = str(e)
             
-            # Validate structure
-            if 'financial_data' not in data:
-                raise ValueError("Response missing 'financial_data' key")
+            if fallback_reason is None or not self.fallback_model:
+                data['metadata']['model_tier'] = 'primary'
+                return data
             
-            # Add extraction metadata
-            data['metadata'] = {
-                'extraction_method': 'openai',
-                'model': self.model,
-                'tokens_used': response.usage.total_tokens,
-                'source_format': format_type.lower()
-            }
-            
-            _log.info(f"Successfully extracted {len(data['financial_data'])} financial items")
+            _log.warning(f"Primary model {self.model} rejected ({fallback_reason}); "
+                         f"retrying with {self.fallback_model}")
+            data = self._extract_with_model(content, company_name, format_type,
+                                            self.fallback_model, force_refresh=force_refresh)
+            data['metadata']['model_tier'] = 'fallback'
+            data['metadata']['fallback_reason'] = fallback_reason
             return data
             
-        except json.JSONDecodeError as e:
-            _log.error(f"Failed to parse JSON response: {str(e)}")
-            _log.error(f"Raw response: {json_str[:500]}...")
-            raise ValueError(f"Invalid JSON response from OpenAI: {str(e)}")
         except Exception as e:
             _log.error(f"Error during OpenAI extraction: {str(e)}", exc_info=True)
             raise
+    
+    def _estimate_tokens(self, request_body: Dict) -> int:
+        """Rough token cost of a request (~4 chars per prompt token plus expected output)."""
+        prompt_chars = sum(len(m['content']) for m in request_body['messages'])
+        return prompt_chars // 4 + self.EXPECTED_OUTPUT_TOKENS
+    
+    @_openai_retry
+    async def _acreate_completion(self, aclient: AsyncOpenAI, request_body: Dict):
+        """Send one chat completion within the rate budget, retrying transient failures."""
+        if self.rate_budget is not None:
+            await self.rate_budget.acquire(self._estimate_tokens(request_body))
+        return await aclient.chat.completions.create(**request_body)
+    
+    async def _aextract_with_model(self, aclient: AsyncOpenAI, content: str, company_name: str,
+                                   format_type: str, model: str, force_refresh: bool = False) -> Dict:
+        """Async counterpart of _extract_with_model (shares prompts and cache)."""
+        request_body = self._build_request_body(content, company_name, format_type, model=model)
+        cache_key = self._cache_key(request_body)
+        
+        if not force_refresh:
+            cached = self._load_cached(cache_key)
+            if cached is not None:
+                _log.info(f"Using cached OpenAI extraction ({cache_key[:12]})")
+                cached.setdefault('metadata', {})['cached'] = True
+                return cached
+        
+        _log.info(f"Sending async request to OpenAI ({model}) for {company_name}...")
+        
+        response = await self._acreate_completion(aclient, request_body)
+        
+        cached_tokens = self._cached_tokens(response.usage)
+        _log.info(f"Received response from OpenAI for {company_name} (tokens used: "
+                  f"{response.usage.total_tokens}, cached prompt tokens: {cached_tokens})")
+        
+        data = self._parse_response(
+            response.choices[0].message.content,
+            response.usage.total_tokens,
+            format_type,
+            model=model,
+            cached_tokens=cached_tokens
+        )
+        
+        self._store_cached(cache_key, data)
+        return data
+    
+    async def _aextract_with_openai(self, aclient: AsyncOpenAI, content: str, company_name: str,
+                                    format_type: str, force_refresh: bool = False) -> Dict:
+        """
+        Async counterpart of _extract_with_openai (same primary/fallback tiering).
+        
+        Args:
+            aclient: AsyncOpenAI client bound to the running event loop
+            content: HTML or Markdown content
+            company_name: Company name
+            format_type: "HTML" or "Markdown"
+            force_refresh: Bypass the response cache and call the API
+        
+        Returns:
+            Extracted financial data dictionary
+        """
+        try:
+            data = await self._aextract_with_model(aclient, content, company_name, format_type,
+                                                   self.model, force_refresh=force_refresh)
+            fallback_reason = self._needs_fallback(data)
+        except ValueError as e:
+            if not self.fallback_model:
+                raise
+            fallback_reason = str(e)
+        
+        if fallback_reason is None or not self.fallback_model:
+            data['metadata']['model_tier'] = 'primary'
+            return data
+        
+        _log.warning(f"Primary model {self.model} rejected for {company_name} "
+                     f"({fallback_reason}); retrying with {self.fallback_model}")
+        data = await self._aextract_with_model(aclient, content, company_name, format_type,
+                                               self.fallback_model, force_refresh=force_refresh)
+        data['metadata']['model_tier'] = 'fallback'
+        data['metadata']['fallback_reason'] = fallback_reason
+        return data
+    
+    async def extract_many(self, jobs: List[Tuple[Path, str, str]], max_concurrency: int = 10,
+                           force_refresh: bool = False) -> List:
+        """
+        Extract several tables concurrently.
+        
+        Each extraction is almost entirely network wait, so running them
+        together brings wall-clock time close to the slowest single call.
+        A semaphore caps in-flight requests, and rate_budget (if set) keeps
+        the request and token rate within the account's per-minute limits.
+        
+        Args:
+            jobs: List of (file_path, company_name, format_type) tuples
+            max_concurrency: Maximum number of simultaneous OpenAI requests
+            force_refresh: Bypass the response cache and call the API
+        
+        Returns:
+            List aligned with jobs; each entry is the extracted data dictionary
+            or the exception raised for that job
+        """
+        # The async client's connection pool is tied to the running loop,
+        # so it is created per call rather than stored on the instance.
+        async with AsyncOpenAI(api_key=self.api_key, max_retries=0) as aclient:
+            return await self._extract_many(aclient, jobs, max_concurrency, force_refresh)
+    
+    def extract_many_blocking(self, jobs: List[Tuple[Path, str, str]], max_concurrency: int = 10,
+                              force_refresh: bool = False) -> List:
+        """
+        extract_many for synchronous callers such as Flask request threads.
+        
+        The extractions run on a long-lived event loop owned by this extractor
+        (one daemon thread per process, started on first use), so every call
+        shares one AsyncOpenAI client and its connection pool instead of
+        building a loop and client per request. The calling thread blocks
+        until the whole batch has finished.
+        
+        Args and return value are the same as extract_many.
+        """
+        loop, aclient = self._background_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self._extract_many(aclient, jobs, max_concurrency, force_refresh), loop
+        )
+        return future.result()
+    
+    def _background_loop(self) -> Tuple[asyncio.AbstractEventLoop, AsyncOpenAI]:
+        """Return the extractor's event loop thread and its AsyncOpenAI client, starting them if needed."""
+        pid = os.getpid()
+        with self._loop_lock:
+            # Threads don't survive fork(), so a worker forked after first use starts its own
+            if self._loop_pid != pid:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='openai-async', daemon=True).start()
+                self._loop = loop
+                self._aclient = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+                self._loop_pid = pid
+            return self._loop, self._aclient
+    
+    async def _extract_many(self, aclient: AsyncOpenAI, jobs: List[Tuple[Path, str, str]],
+                            max_concurrency: int, force_refresh: bool) -> List:
+        """Body of extract_many, using the given client."""
+        sem = asyncio.Semaphore(max_concurrency)
+        
+        async def _bounded(job: Tuple[Path, str, str]) -> Dict:
+            file_path, company_name, format_type = job
+            async with sem:
+                content = self._read_file_content(file_path, self.MAX_READ_BYTES)
+                return await self._aextract_with_openai(
+                    aclient, content, company_name, format_type, force_refresh=force_refresh
+                )
+        
+        results = await asyncio.gather(*[_bounded(job) for job in jobs], return_exceptions=True)
+        
+        for (file_path, _, _), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                _log.error(f"Async extraction failed for {file_path}: {result}")
+        
+        return results
+    
+    def submit_batch(self, items: List[Tuple[Path, str, str]]) -> str:
+        """
+        Submit many extractions as a single OpenAI Batch API job.
+        
+        Batch jobs are billed at half the synchronous price and run within a
+        24h completion window, so they suit bulk ingestion rather than
+        interactive requests.
+        
+        Args:
+            items: List of (file_path, company_name, format_type) tuples where
+                format_type is "HTML" or "Markdown"
+        
+        Returns:
+            OpenAI batch ID
+        """
+        if not items:
+            raise ValueError("No items provided for batch extraction")
+        
+        lines = []
+        for file_path, company_name, format_type in items:
+            content = self._read_file_content(file_path, self.MAX_READ_BYTES)
+            lines.append(orjson.dumps({
+                "custom_id": str(file_path),
+                "method": "POST",
+                "url": self.BATCH_ENDPOINT,
+                "body": self._build_request_body(content, company_name, format_type)
+            }))
+        
+        batch_input = self.client.files.create(
+            file=("batch_input.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_input.id,
+            endpoint=self.BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        
+        _log.info(f"Submitted OpenAI batch {batch.id} with {len(items)} extraction(s)")
+        return batch.id
+    
+    def get_batch_results(self, batch_id: str) -> Dict:
+        """
+        Retrieve the status of a batch job and, once completed, its results.
+        
+        Args:
+            batch_id: OpenAI batch ID returned by submit_batch
+        
+        Returns:
+            Dictionary with:
+            - batch_id: str
+            - status: OpenAI batch status
+            - request_counts: dict of total/completed/failed counts
+            - results: dict mapping source file path -> extracted data (once completed)
+            - errors: dict mapping source file path -> error message (once completed)
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        
+        status = {
+            'batch_id': batch.id,
+            'status': batch.status,
+            'request_counts': {
+                'total': batch.request_counts.total,
+                'completed': batch.request_counts.completed,
+                'failed': batch.request_counts.failed
+            } if batch.request_counts else {},
+            'results': {},
+            'errors': {}
+        }
+        
+        if batch.status != "completed":
+            return status
+        
+        if batch.output_file_id:
+            output = self.client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                custom_id = record['custom_id']
+                format_type = "Markdown" if Path(custom_id).suffix == '.md' else "HTML"
+                
+                try:
+                    if record.get('error'):
+                        raise ValueError(record['error'].get('message', 'Unknown batch error'))
+                    
+                    body = record['response']['body']
+                    if record['response']['status_code'] != 200:
+                        raise ValueError(body.get('error', {}).get('message', 'Request failed'))
+                    
+                    data = self._parse_response(
+                        body['choices'][0]['message']['content'],
+                        body['usage']['total_tokens'],
+                        format_type,
+                        cached_tokens=self._cached_tokens(body['usage'])
+                    )
+                    data['metadata']['batch_id'] = batch.id
+                    data['metadata']['model_tier'] = 'primary'
+                    status['results'][custom_id] = data
+                except (KeyError, ValueError) as e:
+                    _log.warning(f"Batch {batch.id}: extraction failed for {custom_id}: {e}")
+                    status['errors'][custom_id] = str(e)
+        
+        if batch.error_file_id:
+            errors = self.client.files.content(batch.error_file_id).text
+            for line in errors.splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                error = record.get('error') or record.get('response', {}).get('body', {}).get('error', {})
+                status['errors'][record['custom_id']] = error.get('message', 'Unknown batch error')
+        
+        return status
+    
+    def extract_batch(self, items: List[Tuple[Path, str, str]], poll_interval: float = 30.0) -> Dict[str, Dict]:
+        """
+        Run a Batch API job end-to-end, blocking until it finishes.
+        
+        Args:
+            items: List of (file_path, company_name, format_type) tuples
+            poll_interval: Seconds to wait between status checks
+        
+        Returns:
+            Dictionary mapping source file path -> extracted data
+        """
+        batch_id = self.submit_batch(items)
+        
+        while True:
+            status = self.get_batch_results(batch_id)
+            if status['status'] in self.BATCH_TERMINAL_STATUSES:
+                break
+            _log.info(f"Batch {batch_id} status: {status['status']} {status['request_counts']}")
+            time.sleep(poll_interval)
+        
+        if status['status'] != "completed":
+            raise RuntimeError(f"Batch {batch_id} ended with status: {status['status']}")
+        
+        return status['results']
 
 
 def validate_financial_data(data: Dict) -> bool:
     """
     Validate extracted financial data structure.
     
+    Per-item structure is guaranteed by the Structured Outputs schema
+    (see AIFinancialExtractor.RESPONSE_FORMAT), so only the top level is checked.
+    
     Args:
         data: Extracted financial data dictionary
     
@@ -285,26 +1110,7 @@ def validate_financial_data(data: Dict) -> bool:
     if not isinstance(data, dict):
         raise ValueError("Data must be a dictionary")
     
-    if 'company_name' not in data:
-        raise ValueError("Missing 'company_name' key")
-    
-    if 'financial_data' not in data:
-        raise ValueError("Missing 'financial_data' key")
-    
-    if not isinstance(data['financial_data'], list):
-        raise ValueError("'financial_data' must be a list")
-    
-    # Validate each financial item
-    for i, item in enumerate(data['financial_data']):
-        if not isinstance(item, dict):
-            raise ValueError(f"Item {i} is not a dictionary")
-        
-        required_keys = ['particular', 'key', 'values']
-        for key in required_keys:
-            if key not in item:
-                raise ValueError(f"Item {i} missing required key: {key}")
-        
-        if not isinstance(item['values'], dict):
-            raise ValueError(f"Item {i} 'values' must be a dictionary")
+    if not isinstance(data.get('financial_data'), list):
+        raise ValueError("Missing 'financial_data' list")
     
     return True
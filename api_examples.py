@@ -1,8 +1,10 @@
 """
 Example scripts for using the Financial Document Parser API
 """
+import asyncio
 import requests
-import json
+import httpx
+import orjson
 from pathlib import Path
 
 # API Configuration
@@ -17,7 +19,7 @@ def example_1_health_check():
     
     response = requests.get(f"{API_BASE_URL}/health")
     print(f"Status Code: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {orjson.dumps(response.json(), option=orjson.OPT_INDENT_2).decode()}")
     print()
 
 
@@ -96,8 +98,8 @@ def example_3_parse_document(pdf_path, company_name):
         
         # Save full response to file
         output_file = f"api_response_{company_name}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         print(f"\nFull response saved to: {output_file}")
         
     else:
@@ -106,8 +108,49 @@ def example_3_parse_document(pdf_path, company_name):
     print()
 
 
-def example_4_parse_multiple_documents():
-    """Example 4: Parse multiple documents."""
+async def _parse_one(client, semaphore, pdf_path, company_name):
+    """Upload and parse a single document using a shared client."""
+    async with semaphore:
+        print(f"\nProcessing: {Path(pdf_path).name}")
+        try:
+            with open(pdf_path, 'rb') as f:
+                files = {'file': (Path(pdf_path).name, f, 'application/pdf')}
+                data = {'company_name': company_name}
+                response = await client.post("/api/parse", files=files, data=data)
+
+            result = response.json()
+            status = "✓" if result.get('success') else "✗"
+            print(f"{status} {company_name}: {result.get('message') or result.get('error')}")
+            return {
+                'file': Path(pdf_path).name,
+                'company': company_name,
+                'success': result.get('success'),
+                'message': result.get('message') or result.get('error')
+            }
+
+        except Exception as e:
+            print(f"✗ {company_name}: Error - {str(e)}")
+            return {
+                'file': Path(pdf_path).name,
+                'company': company_name,
+                'success': False,
+                'message': str(e)
+            }
+
+
+async def _parse_documents_async(documents, max_concurrency):
+    """Upload documents in parallel over one pooled connection set."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with httpx.AsyncClient(base_url=API_BASE_URL, timeout=300) as client:
+        return await asyncio.gather(*[
+            _parse_one(client, semaphore, pdf_path, company_name)
+            for pdf_path, company_name in documents
+        ])
+
+
+def example_4_parse_multiple_documents(max_concurrency=2):
+    """Example 4: Parse multiple documents concurrently."""
     print("=" * 60)
     print("Example 4: Parse Multiple Documents")
     print("=" * 60)
@@ -119,46 +162,15 @@ def example_4_parse_multiple_documents():
         # Add more as needed
     ]
     
-    results = []
-    
+    available = []
     for pdf_path, company_name in documents:
         if not Path(pdf_path).exists():
             print(f"Skipping {pdf_path} (file not found)")
             continue
-        
-        print(f"\nProcessing: {Path(pdf_path).name}")
-        
-        with open(pdf_path, 'rb') as f:
-            files = {'file': (Path(pdf_path).name, f, 'application/pdf')}
-            data = {'company_name': company_name}
-            
-            try:
-                response = requests.post(
-                    f"{API_BASE_URL}/api/parse",
-                    files=files,
-                    data=data,
-                    timeout=300
-                )
-                
-                result = response.json()
-                results.append({
-                    'file': Path(pdf_path).name,
-                    'company': company_name,
-                    'success': result.get('success'),
-                    'message': result.get('message') or result.get('error')
-                })
-                
-                status = "✓" if result.get('success') else "✗"
-                print(f"{status} {company_name}: {result.get('message') or result.get('error')}")
-                
-            except Exception as e:
-                print(f"✗ {company_name}: Error - {str(e)}")
-                results.append({
-                    'file': Path(pdf_path).name,
-                    'company': company_name,
-                    'success': False,
-                    'message': str(e)
-                })
+        available.append((pdf_path, company_name))
+    
+    # Parsing is CPU-heavy on the server, so keep concurrency modest
+    results = asyncio.run(_parse_documents_async(available, max_concurrency))
     
     # Summary
     print("\n" + "=" * 60)
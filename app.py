@@ -2,25 +2,35 @@
 Flask API for Financial Document Parser Service
 """
 import os
+import hashlib
 import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, abort, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from flask_caching import Cache
 from werkzeug.utils import secure_filename
 import tempfile
 import shutil
+from io import BytesIO, StringIO
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 from parser_core import (
+    EXPORT_FORMATS,
     process_pdf_document,
     load_config,
     get_supported_companies
 )
 from excel_generator import FinancialExcelGenerator, FileManager
-from ai_extractor import AIFinancialExtractor, validate_financial_data
+from ai_extractor import AIFinancialExtractor, RateBudget, validate_financial_data
 
 # Configure logging
 logging.basicConfig(
@@ -29,39 +39,126 @@ logging.basicConfig(
 )
 _log = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-
 # Configuration
 UPLOAD_FOLDER = Path('uploads')
 OUTPUT_FOLDER = Path('output')
 EXCEL_STORAGE_FOLDER = Path('excel_storage')
 ALLOWED_EXTENSIONS = {'pdf'}
+ALLOWED_SUFFIXES = tuple(f'.{ext}' for ext in ALLOWED_EXTENSIONS)
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+# Scratch space for generated files that are moved into EXCEL_STORAGE_FOLDER.
+# Defaults to a directory inside storage, so the move is a rename on the same
+# filesystem. Pointing TEMP_FOLDER at tmpfs (e.g. /dev/shm/fc-tmp) is opt-in:
+# container /dev/shm is often only 64 MB. UPLOAD_FOLDER stays next to
+# OUTPUT_FOLDER so staged uploads can be hard-linked.
+TEMP_FOLDER = Path(os.getenv('TEMP_FOLDER') or EXCEL_STORAGE_FOLDER / '.tmp')
+
+for _folder in (UPLOAD_FOLDER, OUTPUT_FOLDER, EXCEL_STORAGE_FOLDER, TEMP_FOLDER):
+    _folder.mkdir(parents=True, exist_ok=True)
+
+
+class UploadRequest(Request):
+    """Request that spools file uploads to named temp files in UPLOAD_FOLDER.
+
+    Werkzeug's default spool file has no path, forcing uploads to be copied
+    with file.save(). A named file on the same filesystem can instead be
+    hard-linked to its final name (see _stage_upload). The temp file is
+    removed when the request closes.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if filename:
+            return tempfile.NamedTemporaryFile('wb+', dir=UPLOAD_FOLDER, prefix='upload-', suffix='.tmp')
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson for jsonify() and request.get_json()."""
 
-UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
-OUTPUT_FOLDER.mkdir(parents=True, exist_ok=True)
-EXCEL_STORAGE_FOLDER.mkdir(parents=True, exist_ok=True)
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of decoding to str and re-encoding
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+# Initialize Flask app
+app = Flask(__name__)
+app.request_class = UploadRequest
+app.json = OrjsonProvider(app)
+# Cross-origin access is off unless CORS_ORIGINS lists the allowed origins
+# ('*' allows any). Browsers cache preflight responses for a day, so
+# repeated OPTIONS requests don't reach the workers
+CORS_ORIGINS = [o.strip() for o in os.getenv('CORS_ORIGINS', '').split(',') if o.strip()]
+if CORS_ORIGINS:
+    CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}}, max_age=86400)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 app.config['EXCEL_STORAGE_FOLDER'] = EXCEL_STORAGE_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+# Text form fields (company_name, flags) are tiny; cap what is buffered for them
+app.config['MAX_FORM_MEMORY_SIZE'] = 64 * 1024
+
+# Let the front-end web server send download files itself. Set USE_X_SENDFILE
+# behind Apache (mod_xsendfile) or lighttpd; behind Nginx also set
+# NGINX_ACCEL_PREFIX to an `internal` location aliased to the app directory.
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'False').lower() == 'true'
+NGINX_ACCEL_PREFIX = os.environ.get('NGINX_ACCEL_PREFIX', '').rstrip('/')
+DOWNLOAD_MAX_AGE = 300
+
+# Cache for read-mostly endpoints. SimpleCache is per process; set
+# CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share it between workers.
+app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'SimpleCache')
+app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+if os.environ.get('CACHE_REDIS_URL'):
+    app.config['CACHE_REDIS_URL'] = os.environ['CACHE_REDIS_URL']
+cache = Cache(app)
+
+# Background PDF parsing for /api/parse?async=true. Jobs run on a thread pool
+# in the worker that accepted them; their state is kept in a JSON file per job
+# under PARSE_JOBS_FOLDER for PARSE_JOB_TTL seconds, so any worker can answer
+# status polls and finished results outlive a worker restart.
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 2))
+PARSE_JOB_TTL = 3600
+PARSE_JOBS_FOLDER = OUTPUT_FOLDER / '.parse_jobs'
+parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix='parse')
+PARSE_JOBS_FOLDER.mkdir(parents=True, exist_ok=True)
 
 # Initialize file manager
 file_manager = FileManager(EXCEL_STORAGE_FOLDER)
 
+# Stateless, so a single generator serves every request
+excel_generator = FinancialExcelGenerator()
+
 # Initialize AI extractor (optional - requires OPENAI_API_KEY)
 try:
-    ai_extractor = AIFinancialExtractor()
-    print("AI extractor initialized")
+    ai_extractor = AIFinancialExtractor(
+        model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
+        fallback_model=os.getenv('OPENAI_FALLBACK_MODEL') or None,
+        cache_max_age_days=float(os.getenv('AI_CACHE_MAX_AGE_DAYS', '30')),
+        rate_budget=RateBudget(
+            rpm=int(os.getenv('OPENAI_RPM', '500')),
+            tpm=int(os.getenv('OPENAI_TPM', '200000'))
+        )
+    )
     _log.info("AI extractor initialized successfully")
 except Exception as e:
     _log.warning(f"AI extractor not available: {str(e)}")
-    print("AI extractor not available")
     ai_extractor = None
 
+# Supported companies are static: resolve once, with a set for O(1) validation
+SUPPORTED_COMPANIES = get_supported_companies()
+SUPPORTED_COMPANY_SET = frozenset(SUPPORTED_COMPANIES)
+COMPANIES_ETAG = hashlib.sha1(orjson.dumps(SUPPORTED_COMPANIES)).hexdigest()[:16]
+
 # Load configuration
 try:
     config = load_config()
@@ -71,9 +168,67 @@ except Exception as e:
     config = None
 
 
+@lru_cache(maxsize=1024)
+def _output_dir(company_name: str, document_name: str) -> Path:
+    """Output directory for a parsed document (OUTPUT_FOLDER/<COMPANY>_<document>)."""
+    return OUTPUT_FOLDER / f"{company_name}_{document_name}"
+
+
+def _fail(message: str, status_code: int = 400):
+    """Build the standard {'success': False, 'error': ...} response."""
+    return jsonify({'success': False, 'error': message}), status_code
+
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(ALLOWED_SUFFIXES)
+
+
+def _stage_upload(file, dest_path: Path) -> None:
+    """Place an uploaded file at dest_path, hard-linking its spool file instead of copying when possible."""
+    spool_path = getattr(file.stream, 'name', None)
+    if isinstance(spool_path, str) and os.path.exists(spool_path):
+        file.stream.flush()
+        try:
+            os.link(spool_path, dest_path)
+            return
+        except OSError as e:
+            _log.debug(f"Could not hard-link upload ({e}), copying instead")
+    file.save(str(dest_path), buffer_size=1024 * 1024)
+
+
+@app.before_request
+def _reject_oversized_request():
+    """Refuse bodies whose declared Content-Length is over the limit before anything is read or spooled."""
+    if request.content_length and request.content_length > MAX_FILE_SIZE:
+        abort(413)
+
+
+@app.after_request
+def _use_nginx_accel_redirect(response):
+    """Translate Werkzeug's X-Sendfile header into Nginx's X-Accel-Redirect."""
+    if NGINX_ACCEL_PREFIX and 'X-Sendfile' in response.headers:
+        rel_path = os.path.relpath(response.headers.pop('X-Sendfile'), app.root_path)
+        response.headers['X-Accel-Redirect'] = f"{NGINX_ACCEL_PREFIX}/{Path(rel_path).as_posix()}"
+    return response
+
+
+@app.after_request
+def _conditional_json(response):
+    """Answer If-None-Match with 304 for JSON responses that carry an ETag.
+
+    Runs after Flask-Caching, so cached views like /api/companies benefit too.
+    """
+    if response.status_code == 200 and response.is_json and 'ETag' in response.headers:
+        response.make_conditional(request)
+    return response
+
+
+def _not_modified(etag: str):
+    """304 response for a client that already holds etag."""
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    return response
 
 
 @app.route('/health', methods=['GET'])
@@ -87,14 +242,16 @@ def health_check():
 
 
 @app.route('/api/companies', methods=['GET'])
+@cache.cached(timeout=3600, key_prefix='companies')
 def get_companies():
     """Get list of supported companies."""
     try:
-        companies = get_supported_companies()
-        return jsonify({
+        response = jsonify({
             'success': True,
-            'companies': companies
-        }), 200
+            'companies': SUPPORTED_COMPANIES
+        })
+        response.set_etag(COMPANIES_ETAG)
+        return response
     except Exception as e:
         _log.error(f"Error getting companies: {str(e)}")
         return jsonify({
@@ -113,6 +270,9 @@ def parse_document():
     - company_name: Company name (required, e.g., "BRITANNIA", "COLGATE", etc.)
     - prefer_standalone: Prefer standalone over consolidated statements (optional, default: true)
     - use_fuzzy_matching: Enable fuzzy label matching fallback (optional, default: true)
+    - async: Parse in the background and return a job ID (optional, default: false)
+    - export_formats: Comma-separated table files to write: csv, html, md
+      (optional, default: all three; HTML is always written)
     
     Returns:
     - success: bool
@@ -121,123 +281,474 @@ def parse_document():
     - output_files: Generated file paths
     - processing_time: Processing duration
     - table_info: Table selection metadata (total_tables, selected_table, selection_method)
+    
+    With async=true: 202 with job_id and status_url; poll /api/parse/status/<job_id>
+    for the same payload.
     """
     try:
-        # Check if config is loaded
         if config is None:
-            return jsonify({
-                'success': False,
-                'error': 'Configuration not loaded'
-            }), 500
-        
-        # Check if file is present
-        if 'file' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'No file provided'
-            }), 400
-        
-        file = request.files['file']
-        
-        # Check if file is selected
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'error': 'No file selected'
-            }), 400
-        
-        # Check if company name is provided
-        company_name = request.form.get('company_name', '').upper()
+            return _fail('Configuration not loaded', 500)
+        
+        # Validate inputs, returning on the first failure
+        form = request.form
+        file = request.files.get('file')
+        company_name = form.get('company_name', '').upper()
+        if file is None:
+            return _fail('No file provided')
+        if not file.filename:
+            return _fail('No file selected')
         if not company_name:
-            return jsonify({
-                'success': False,
-                'error': 'Company name not provided'
-            }), 400
-        
-        # Validate company name
-        if company_name not in get_supported_companies():
-            return jsonify({
-                'success': False,
-                'error': f'Unsupported company: {company_name}. Supported: {get_supported_companies()}'
-            }), 400
-        
-        # Check file extension
+            return _fail('Company name not provided')
+        if company_name not in SUPPORTED_COMPANY_SET:
+            return _fail(f'Unsupported company: {company_name}. Supported: {SUPPORTED_COMPANIES}')
         if not allowed_file(file.filename):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid file type. Only PDF files are allowed.'
-            }), 400
+            return _fail('Invalid file type. Only PDF files are allowed.')
         
         # Get optional optimization parameters
-        prefer_standalone = request.form.get('prefer_standalone', 'true').lower() == 'true'
-        use_fuzzy_matching = request.form.get('use_fuzzy_matching', 'true').lower() == 'true'
+        prefer_standalone = form.get('prefer_standalone', 'true').lower() == 'true'
+        use_fuzzy_matching = form.get('use_fuzzy_matching', 'true').lower() == 'true'
+        run_async = form.get('async', 'false').lower() == 'true'
+        export_formats = {fmt.strip().lower() for fmt in form.get('export_formats', 'csv,html,md').split(',')}
+        if not export_formats <= EXPORT_FORMATS:
+            return _fail(f'Unsupported export_formats. Supported: {sorted(EXPORT_FORMATS)}')
         
-        # Save uploaded file
+        # Create output directory for this request
         filename = secure_filename(file.filename)
-        temp_dir = Path(tempfile.mkdtemp())
-        file_path = temp_dir / filename
-        file.save(str(file_path))
+        output_dir = _output_dir(company_name, Path(filename).stem)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        _log.info(f"Processing file: {filename} for company: {company_name}")
-        _log.info(f"Options: prefer_standalone={prefer_standalone}, use_fuzzy_matching={use_fuzzy_matching}")
+        # Stage the uploaded PDF in a private directory under the output directory,
+        # keeping its name so concurrent uploads of the same file don't collide
+        file_path = Path(tempfile.mkdtemp(dir=output_dir, prefix='.upload-')) / filename
+        try:
+            _stage_upload(file, file_path)
+        except Exception:
+            shutil.rmtree(file_path.parent, ignore_errors=True)
+            raise
+        
+        parse_args = (file_path, company_name, output_dir, prefer_standalone, use_fuzzy_matching, export_formats)
+        
+        if run_async:
+            job_id = uuid.uuid4().hex
+            _prune_parse_jobs()
+            _write_parse_job(job_id, {'status': 'queued', 'created_at': time.time(), 'pid': os.getpid()})
+            parse_executor.submit(_run_parse_job, job_id, *parse_args)
+            
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/api/parse/status/{job_id}'
+            }), 202
         
-        # Create output directory for this request
-        output_dir = OUTPUT_FOLDER / f"{company_name}_{file_path.stem}"
-        output_dir.mkdir(parents=True, exist_ok=True)
+        payload, status_code = _parse_response_payload(_parse_staged_pdf(*parse_args))
+        return jsonify(payload), status_code
+            
+    except Exception as e:
+        _log.error(f"Error processing request: {str(e)}", exc_info=True)
+        return _fail(f'Internal server error: {str(e)}', 500)
+
+
+def _parse_staged_pdf(file_path: Path, company_name: str, output_dir: Path,
+                      prefer_standalone: bool, use_fuzzy_matching: bool, export_formats: set) -> dict:
+    """Run the parsing pipeline on a staged upload, removing its staging directory afterwards."""
+    try:
+        _log.info(f"Processing file: {file_path.name} for company: {company_name}")
+        _log.info(f"Options: prefer_standalone={prefer_standalone}, use_fuzzy_matching={use_fuzzy_matching}")
         
         # Process document with optimization parameters
-        result = process_pdf_document(
+        return process_pdf_document(
             pdf_path=file_path,
             company_name=company_name,
             output_dir=output_dir,
             config=config,
             prefer_standalone=prefer_standalone,
-            use_fuzzy_matching=use_fuzzy_matching
+            use_fuzzy_matching=use_fuzzy_matching,
+            export_formats=export_formats
         )
-        
-        # Clean up temporary file
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        
+    finally:
+        # The PDF is only needed while parsing
+        shutil.rmtree(file_path.parent, ignore_errors=True)
+
+
+def _parse_response_payload(result: dict):
+    """Build the /api/parse response body and status code from a process_pdf_document result."""
+    if result['success']:
+        return {
+            'success': True,
+            'message': result['message'],
+            'data': result['json_result'],
+            'output_files': result['output_files'],
+            'processing_time': result.get('processing_time'),
+            'table_info': result.get('table_info', {})
+        }, 200
+    return {
+        'success': False,
+        'error': result['message']
+    }, 500
+
+
+def _parse_job_path(job_id: str) -> Path:
+    """State file of a background parse job."""
+    return PARSE_JOBS_FOLDER / f'{job_id}.json'
+
+
+def _write_parse_job(job_id: str, job: dict) -> None:
+    """Replace a parse job's state file atomically, so readers never see a partial write."""
+    path = _parse_job_path(job_id)
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_bytes(orjson.dumps(job))
+    os.replace(tmp_path, path)
+
+
+def _read_parse_job(job_id: str):
+    """Return a parse job's state, or None if it is unknown or has expired."""
+    try:
+        return orjson.loads(_parse_job_path(job_id).read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether the worker process that owns a job is still running."""
+    if os.name == 'nt':
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows; assume it is alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _prune_parse_jobs():
+    """Delete parse job files not updated for PARSE_JOB_TTL seconds."""
+    cutoff = time.time() - PARSE_JOB_TTL
+    for path in PARSE_JOBS_FOLDER.glob('*.json'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _run_parse_job(job_id: str, *parse_args):
+    """Background worker for /api/parse?async=true."""
+    job = _read_parse_job(job_id) or {'created_at': time.time(), 'pid': os.getpid()}
+    _write_parse_job(job_id, {**job, 'status': 'running'})
+    try:
+        payload, status_code = _parse_response_payload(_parse_staged_pdf(*parse_args))
+    except Exception as e:
+        _log.error(f"Error processing parse job {job_id}: {str(e)}", exc_info=True)
+        payload, status_code = {'success': False, 'error': f'Internal server error: {str(e)}'}, 500
+    _write_parse_job(job_id, {
+        **job,
+        'status': 'completed' if status_code == 200 else 'failed',
+        'result': payload,
+        'finished_at': time.time()
+    })
+
+
+@app.route('/api/parse/status/<job_id>', methods=['GET'])
+def get_parse_status(job_id):
+    """
+    Get the status of a background parse job (see /api/parse with async=true).
+
+    Returns:
+    - status: queued, running, completed or failed
+    - result: The /api/parse response body once the job has finished
+    """
+    # Job IDs are uuid4 hex; anything else can't name a job file
+    job = _read_parse_job(job_id) if len(job_id) == 32 and job_id.isalnum() else None
+
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown parse job: {job_id}'
+        }), 404
+
+    if job['status'] in ('queued', 'running') and not _process_alive(job['pid']):
+        # The worker running the job exited (restart, max_requests recycle) before it finished
+        job['status'] = 'failed'
+        job['result'] = {
+            'success': False,
+            'error': 'Parse job was interrupted by a server restart; please submit the document again'
+        }
+
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': job['status'],
+        'result': job.get('result')
+    }), 200
+
+
+def _parse_uploaded_documents(preferred_format: str):
+    """
+    Validate and parse the multi-file upload of a batch/bulk request.
+
+    Each PDF is parsed with the config-driven pipeline as in /api/parse and
+    the table file to hand to AI extraction is located in its output directory.
+
+    Returns:
+        Tuple of (documents, jobs, error_response). documents holds per-file parse
+        results, jobs holds (table_file, company_name, format_type) tuples for the
+        AI extractor, and error_response is a Flask response when validation failed.
+    """
+    files = [f for f in request.files.getlist('files') if f.filename]
+    if not files:
+        return None, None, _fail('No files provided')
+
+    company_names = [name.upper() for name in request.form.getlist('company_name')]
+    if len(company_names) == 1:
+        company_names = company_names * len(files)
+    if len(company_names) != len(files):
+        return None, None, _fail('Provide one company_name per file (or a single company_name for all files)')
+
+    for file, company_name in zip(files, company_names):
+        if company_name not in SUPPORTED_COMPANY_SET:
+            return None, None, _fail(f'Unsupported company: {company_name}. Supported: {SUPPORTED_COMPANIES}')
+        if not allowed_file(file.filename):
+            return None, None, _fail(f'Invalid file type for {file.filename}. Only PDF files are allowed.')
+
+    documents = []
+    jobs = []
+    for file, company_name in zip(files, company_names):
+        filename = secure_filename(file.filename)
+        output_dir = _output_dir(company_name, Path(filename).stem)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        file_path = Path(tempfile.mkdtemp(dir=output_dir, prefix='.upload-')) / filename
+        try:
+            _stage_upload(file, file_path)
+
+            _log.info(f"Processing file: {filename} for company: {company_name}")
+
+            # Bulk results only feed AI extraction, which reads HTML or Markdown
+            result = process_pdf_document(
+                pdf_path=file_path,
+                company_name=company_name,
+                output_dir=output_dir,
+                config=config,
+                export_formats={"html", "md"} if preferred_format == "markdown" else {"html"}
+            )
+        finally:
+            shutil.rmtree(file_path.parent, ignore_errors=True)
+
+        document = {
+            'file': filename,
+            'company_name': company_name,
+            'document_name': file_path.stem,
+            'success': result['success'],
+            'message': result['message']
+        }
+
         if result['success']:
+            try:
+                table_file, format_type = ai_extractor.find_table_file(output_dir, preferred_format)
+                jobs.append((table_file, company_name, format_type))
+                document['source_file'] = str(table_file)
+            except FileNotFoundError as e:
+                document['success'] = False
+                document['message'] = str(e)
+
+        documents.append(document)
+
+    return documents, jobs, None
+
+
+@app.route('/api/parse/batch', methods=['POST'])
+def parse_document_batch():
+    """
+    Parse multiple financial documents and submit their AI extraction as one OpenAI batch.
+
+    Each PDF is parsed with the config-driven pipeline as in /api/parse; the
+    resulting tables are then submitted to the OpenAI Batch API (half price,
+    24h completion window). Poll /api/batch/<batch_id> for the results.
+
+    Expected form data:
+    - files: PDF files (required, repeat the field for each file)
+    - company_name: Company name per file (required, repeat in the same order as files,
+      or provide once to apply to all files)
+    - preferred_format: "html" or "markdown" for AI extraction (optional, default: "html")
+
+    Returns:
+    - success: bool
+    - batch_id: OpenAI batch ID
+    - status_url: URL to poll for batch status/results
+    - documents: Per-file parse results
+    """
+    try:
+        if ai_extractor is None:
             return jsonify({
-                'success': True,
-                'message': result['message'],
-                'data': result['json_result'],
-                'output_files': result['output_files'],
-                'processing_time': result.get('processing_time'),
-                'table_info': result.get('table_info', {})
-            }), 200
-        else:
+                'success': False,
+                'error': 'AI extraction not available. Please set OPENAI_API_KEY environment variable.'
+            }), 503
+
+        if config is None:
             return jsonify({
                 'success': False,
-                'error': result['message']
+                'error': 'Configuration not loaded'
             }), 500
-            
+
+        preferred_format = request.form.get('preferred_format', 'html').lower()
+        documents, batch_items, error_response = _parse_uploaded_documents(preferred_format)
+        if error_response:
+            return error_response
+
+        if not batch_items:
+            return jsonify({
+                'success': False,
+                'error': 'No documents could be parsed for AI extraction',
+                'documents': documents
+            }), 500
+
+        batch_id = ai_extractor.submit_batch(batch_items)
+
+        return jsonify({
+            'success': True,
+            'message': f'Submitted {len(batch_items)} document(s) for batch AI extraction',
+            'batch_id': batch_id,
+            'status_url': f'/api/batch/{batch_id}',
+            'documents': documents
+        }), 202
+
     except Exception as e:
-        _log.error(f"Error processing request: {str(e)}", exc_info=True)
+        _log.error(f"Error processing batch request: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+@app.route('/api/parse/bulk', methods=['POST'])
+def parse_document_bulk():
+    """
+    Parse multiple financial documents and run their AI extraction concurrently.
+
+    Same input as /api/parse/batch, but extractions are sent to OpenAI right
+    away (bounded by max_concurrency) and results are returned in the response.
+    They run on the extractor's shared event loop; this request's worker thread
+    waits for the whole batch, so use /api/parse/batch for large uploads.
+
+    Expected form data:
+    - files: PDF files (required, repeat the field for each file)
+    - company_name: Company name per file (required, repeat in the same order as files,
+      or provide once to apply to all files)
+    - preferred_format: "html" or "markdown" for AI extraction (optional, default: "html")
+    - max_concurrency: Maximum simultaneous OpenAI requests (optional, default: 10)
+
+    Returns:
+    - success: bool
+    - documents: Per-file parse results with extracted 'data' or 'error'
+    """
+    try:
+        if ai_extractor is None:
+            return jsonify({
+                'success': False,
+                'error': 'AI extraction not available. Please set OPENAI_API_KEY environment variable.'
+            }), 503
+
+        if config is None:
+            return jsonify({
+                'success': False,
+                'error': 'Configuration not loaded'
+            }), 500
+
+        preferred_format = request.form.get('preferred_format', 'html').lower()
+        try:
+            max_concurrency = max(1, int(request.form.get('max_concurrency', 10)))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'max_concurrency must be an integer'
+            }), 400
+
+        documents, jobs, error_response = _parse_uploaded_documents(preferred_format)
+        if error_response:
+            return error_response
+
+        results = ai_extractor.extract_many_blocking(jobs, max_concurrency=max_concurrency)
+        results_by_source = {
+            str(table_file): result for (table_file, _, _), result in zip(jobs, results)
+        }
+
+        for document in documents:
+            result = results_by_source.get(document.get('source_file'))
+            if result is None:
+                continue
+            if isinstance(result, Exception):
+                document['success'] = False
+                document['error'] = str(result)
+            else:
+                document['data'] = result
+
+        successful = sum(1 for d in documents if d['success'])
+
+        return jsonify({
+            'success': successful > 0,
+            'message': f'Extracted {successful} of {len(documents)} document(s)',
+            'documents': documents
+        }), 200 if successful else 500
+
+    except Exception as e:
+        _log.error(f"Error processing bulk request: {str(e)}", exc_info=True)
         return jsonify({
             'success': False,
             'error': f'Internal server error: {str(e)}'
         }), 500
 
 
+@app.route('/api/batch/<batch_id>', methods=['GET'])
+def get_batch_status(batch_id):
+    """
+    Get the status of an OpenAI batch extraction and its results once completed.
+
+    Results are keyed by the source table file submitted for each document
+    (see 'source_file' in the /api/parse/batch response).
+    """
+    try:
+        if ai_extractor is None:
+            return jsonify({
+                'success': False,
+                'error': 'AI extraction not available. Please set OPENAI_API_KEY environment variable.'
+            }), 503
+
+        batch_status = ai_extractor.get_batch_results(batch_id)
+
+        return jsonify({
+            'success': True,
+            **batch_status
+        }), 200
+
+    except Exception as e:
+        _log.error(f"Error getting batch status: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/download/<path:filename>', methods=['GET'])
 def download_file(filename):
     """Download generated file."""
     try:
         file_path = OUTPUT_FOLDER / filename
         
-        if not file_path.exists():
-            return jsonify({
-                'success': False,
-                'error': 'File not found'
-            }), 404
-        
+        # send_file stats the file itself; no separate exists() check
         return send_file(
             file_path,
             as_attachment=True,
-            download_name=file_path.name
+            download_name=file_path.name,
+            conditional=True,
+            max_age=DOWNLOAD_MAX_AGE
         )
+    except FileNotFoundError:
+        return jsonify({
+            'success': False,
+            'error': 'File not found'
+        }), 404
     except Exception as e:
         _log.error(f"Error downloading file: {str(e)}")
         return jsonify({
@@ -250,23 +761,28 @@ def download_file(filename):
 def get_results(company_name, document_name):
     """Get parsing results for a specific document."""
     try:
-        output_dir = OUTPUT_FOLDER / f"{company_name}_{document_name}"
-        json_file = output_dir / f"{document_name}-financial-data.json"
+        json_file = _output_dir(company_name, document_name) / f"{document_name}-financial-data.json"
         
-        if not json_file.exists():
+        try:
+            st = os.stat(json_file)
+            # mtime+size identifies the file version; skip the read on a match
+            etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+            if request.if_none_match.contains(etag):
+                return _not_modified(etag)
+            with open(json_file, 'rb') as f:
+                data = orjson.loads(f.read())
+        except FileNotFoundError:
             return jsonify({
                 'success': False,
                 'error': 'Results not found'
             }), 404
         
-        import json
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': data
-        }), 200
+        })
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         _log.error(f"Error getting results: {str(e)}")
@@ -290,9 +806,19 @@ def update_financial_data():
     }
     """
     try:
-        data = request.get_json()
+        # Parse the raw body with orjson; cache=False keeps Werkzeug from
+        # holding a second copy of a potentially large payload
+        raw = request.get_data(cache=False)
+        try:
+            data = orjson.loads(raw) if raw else None
+        except orjson.JSONDecodeError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid JSON body'
+            }), 400
+        del raw
         
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({
                 'success': False,
                 'error': 'No data provided'
@@ -316,7 +842,7 @@ def update_financial_data():
             }), 400
         
         # Validate company name
-        if company_name not in get_supported_companies():
+        if company_name not in SUPPORTED_COMPANY_SET:
             return jsonify({
                 'success': False,
                 'error': f'Unsupported company: {company_name}'
@@ -329,10 +855,8 @@ def update_financial_data():
         }
         
         # Determine output path
-        output_dir = OUTPUT_FOLDER / f"{company_name}_{document_name}"
-        
-        if not output_dir.exists():
-            output_dir.mkdir(parents=True, exist_ok=True)
+        output_dir = _output_dir(company_name, document_name)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         if create_new:
             # Create a new edited version
@@ -342,9 +866,8 @@ def update_financial_data():
             json_file = output_dir / f"{document_name}-financial-data.json"
         
         # Save updated JSON
-        import json
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_data, f, indent=2, ensure_ascii=False)
+        with open(json_file, 'wb') as f:
+            f.write(orjson.dumps(updated_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         
         _log.info(f"Updated financial data saved to {json_file}")
         
@@ -402,48 +925,50 @@ def generate_excel():
             'financial_data': data.get('financial_data', [])
         }
         
-        # Generate Excel
-        generator = FinancialExcelGenerator()
-        temp_dir = Path(tempfile.mkdtemp())
-        company_name_safe = json_data['company_name'].replace(' ', '_')
-        excel_file = temp_dir / f"{company_name_safe}_financial_statement.xlsx"
-        
-        success = generator.generate_excel(json_data, excel_file)
-        
-        if not success:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return jsonify({
-                'success': False,
-                'error': 'Failed to generate Excel file'
-            }), 500
-        
         # Check if we should save to storage
         save_to_storage = data.get('save', False)
         
+        # Generate Excel (in memory unless it is being saved to storage)
+        company_name_safe = json_data['company_name'].replace(' ', '_')
+        download_name = f"{company_name_safe}_financial_statement.xlsx"
         if save_to_storage:
-            # Save to storage and return file ID
-            file_id = file_manager.save_file(excel_file, json_data['company_name'], 'excel')
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
-            return jsonify({
-                'success': True,
-                'message': 'Excel file generated and saved',
-                'file_id': file_id,
-                'download_url': f'/api/download-generated/{file_id}'
-            }), 200
+            temp_dir = Path(tempfile.mkdtemp(dir=TEMP_FOLDER))
+            excel_file = temp_dir / download_name
         else:
-            # Return file directly
-            try:
+            excel_file = BytesIO()
+        
+        try:
+            success = excel_generator.generate_excel(json_data, excel_file)
+        
+            if not success:
+                return jsonify({
+                    'success': False,
+                    'error': 'Failed to generate Excel file'
+                }), 500
+        
+            if save_to_storage:
+                # Save to storage and return file ID
+                file_id = file_manager.save_file(excel_file, json_data['company_name'], 'excel')
+                _invalidate_generated_files()
+            
+                return jsonify({
+                    'success': True,
+                    'message': 'Excel file generated and saved',
+                    'file_id': file_id,
+                    'download_url': f'/api/download-generated/{file_id}'
+                }), 200
+            else:
+                # Return file directly
+                excel_file.seek(0)
                 return send_file(
                     excel_file,
                     as_attachment=True,
-                    download_name=excel_file.name,
+                    download_name=download_name,
                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
                 )
-            finally:
-                # Clean up temp file after sending
-                import atexit
-                atexit.register(lambda: shutil.rmtree(temp_dir, ignore_errors=True))
+        finally:
+            if save_to_storage:
+                shutil.rmtree(temp_dir, ignore_errors=True)
         
     except Exception as e:
         _log.error(f"Error generating Excel: {str(e)}", exc_info=True)
@@ -492,48 +1017,49 @@ def generate_csv():
             'financial_data': data.get('financial_data', [])
         }
         
-        # Generate CSV
-        generator = FinancialExcelGenerator()
-        temp_dir = Path(tempfile.mkdtemp())
-        company_name_safe = json_data['company_name'].replace(' ', '_')
-        csv_file = temp_dir / f"{company_name_safe}_financial_statement.csv"
-        
-        success = generator.generate_csv(json_data, csv_file)
-        
-        if not success:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return jsonify({
-                'success': False,
-                'error': 'Failed to generate CSV file'
-            }), 500
-        
         # Check if we should save to storage
         save_to_storage = data.get('save', False)
         
+        # Generate CSV (in memory unless it is being saved to storage)
+        company_name_safe = json_data['company_name'].replace(' ', '_')
+        download_name = f"{company_name_safe}_financial_statement.csv"
         if save_to_storage:
-            # Save to storage and return file ID
-            file_id = file_manager.save_file(csv_file, json_data['company_name'], 'csv')
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
-            return jsonify({
-                'success': True,
-                'message': 'CSV file generated and saved',
-                'file_id': file_id,
-                'download_url': f'/api/download-generated/{file_id}'
-            }), 200
+            temp_dir = Path(tempfile.mkdtemp(dir=TEMP_FOLDER))
+            csv_file = temp_dir / download_name
         else:
-            # Return file directly
-            try:
+            csv_file = StringIO(newline='')
+        
+        try:
+            success = excel_generator.generate_csv(json_data, csv_file)
+        
+            if not success:
+                return jsonify({
+                    'success': False,
+                    'error': 'Failed to generate CSV file'
+                }), 500
+        
+            if save_to_storage:
+                # Save to storage and return file ID
+                file_id = file_manager.save_file(csv_file, json_data['company_name'], 'csv')
+                _invalidate_generated_files()
+            
+                return jsonify({
+                    'success': True,
+                    'message': 'CSV file generated and saved',
+                    'file_id': file_id,
+                    'download_url': f'/api/download-generated/{file_id}'
+                }), 200
+            else:
+                # Return file directly
                 return send_file(
-                    csv_file,
+                    BytesIO(csv_file.getvalue().encode('utf-8')),
                     as_attachment=True,
-                    download_name=csv_file.name,
+                    download_name=download_name,
                     mimetype='text/csv'
                 )
-            finally:
-                # Clean up temp file after sending
-                import atexit
-                atexit.register(lambda: shutil.rmtree(temp_dir, ignore_errors=True))
+        finally:
+            if save_to_storage:
+                shutil.rmtree(temp_dir, ignore_errors=True)
         
     except Exception as e:
         _log.error(f"Error generating CSV: {str(e)}", exc_info=True)
@@ -553,7 +1079,8 @@ def generate_excel_ai():
         "company_name": "BRITANNIA",
         "document_name": "Britannia_Unaudited_Q2_June_2026",  // Output directory name
         "preferred_format": "html",  // Optional: "html" or "markdown" (default: "html")
-        "save": false  // Optional: save to storage (default: false)
+        "save": false,  // Optional: save to storage (default: false)
+        "force_refresh": false  // Optional: bypass cached AI extraction (default: false)
     }
     
     Returns:
@@ -579,6 +1106,7 @@ def generate_excel_ai():
         company_name = data.get('company_name', '').upper()
         document_name = data.get('document_name', '')
         preferred_format = data.get('preferred_format', 'html').lower()
+        force_refresh = data.get('force_refresh', False)
         
         if not company_name or not document_name:
             return jsonify({
@@ -587,16 +1115,16 @@ def generate_excel_ai():
             }), 400
         
         # Validate company name
-        if company_name not in get_supported_companies():
+        if company_name not in SUPPORTED_COMPANY_SET:
             return jsonify({
                 'success': False,
                 'error': f'Unsupported company: {company_name}'
             }), 400
         
         # Locate output directory
-        output_dir = OUTPUT_FOLDER / f"{company_name}_{document_name}"
+        output_dir = _output_dir(company_name, document_name)
         
-        if not output_dir.exists():
+        if not output_dir.is_dir():
             return jsonify({
                 'success': False,
                 'error': f'No parsed results found for {company_name}/{document_name}'
@@ -609,7 +1137,8 @@ def generate_excel_ai():
             extracted_data = ai_extractor.extract_from_output_dir(
                 output_dir, 
                 company_name,
-                preferred_format=preferred_format
+                preferred_format=preferred_format,
+                force_refresh=force_refresh
             )
             
             # Validate extracted data
@@ -626,49 +1155,51 @@ def generate_excel_ai():
                 'error': f'Invalid data extracted: {str(e)}'
             }), 500
         
-        # Generate Excel from AI-extracted data
-        generator = FinancialExcelGenerator()
-        temp_dir = Path(tempfile.mkdtemp())
-        company_name_safe = company_name.replace(' ', '_')
-        excel_file = temp_dir / f"{company_name_safe}_AI_financial_statement.xlsx"
-        
-        success = generator.generate_excel(extracted_data, excel_file)
-        
-        if not success:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return jsonify({
-                'success': False,
-                'error': 'Failed to generate Excel file from AI-extracted data'
-            }), 500
-        
         # Check if we should save to storage
         save_to_storage = data.get('save', False)
         
+        # Generate Excel from AI-extracted data (in memory unless it is being saved)
+        company_name_safe = company_name.replace(' ', '_')
+        download_name = f"{company_name_safe}_AI_financial_statement.xlsx"
         if save_to_storage:
-            # Save to storage and return file ID
-            file_id = file_manager.save_file(excel_file, company_name, 'excel')
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
-            return jsonify({
-                'success': True,
-                'message': 'Excel file generated using AI and saved',
-                'file_id': file_id,
-                'download_url': f'/api/download-generated/{file_id}',
-                'metadata': extracted_data.get('metadata', {})
-            }), 200
+            temp_dir = Path(tempfile.mkdtemp(dir=TEMP_FOLDER))
+            excel_file = temp_dir / download_name
         else:
-            # Return file directly
-            try:
+            excel_file = BytesIO()
+        
+        try:
+            success = excel_generator.generate_excel(extracted_data, excel_file)
+        
+            if not success:
+                return jsonify({
+                    'success': False,
+                    'error': 'Failed to generate Excel file from AI-extracted data'
+                }), 500
+        
+            if save_to_storage:
+                # Save to storage and return file ID
+                file_id = file_manager.save_file(excel_file, company_name, 'excel')
+                _invalidate_generated_files()
+            
+                return jsonify({
+                    'success': True,
+                    'message': 'Excel file generated using AI and saved',
+                    'file_id': file_id,
+                    'download_url': f'/api/download-generated/{file_id}',
+                    'metadata': extracted_data.get('metadata', {})
+                }), 200
+            else:
+                # Return file directly
+                excel_file.seek(0)
                 return send_file(
                     excel_file,
                     as_attachment=True,
-                    download_name=excel_file.name,
+                    download_name=download_name,
                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
                 )
-            finally:
-                # Clean up temp file after sending
-                import atexit
-                atexit.register(lambda: shutil.rmtree(temp_dir, ignore_errors=True))
+        finally:
+            if save_to_storage:
+                shutil.rmtree(temp_dir, ignore_errors=True)
         
     except Exception as e:
         _log.error(f"Error generating AI Excel: {str(e)}", exc_info=True)
@@ -723,24 +1254,26 @@ def download_generated_file(file_id):
             extension = '.xlsx' if file_info['file_type'] == 'excel' else '.csv'
             file_path = EXCEL_STORAGE_FOLDER / f"{file_info['file_id']}{extension}"
 
-        print( f"Downloading file from path: {file_path}" )  # Debugging line
+        _log.debug("Downloading file from path: %s", file_path)
         
-        if not file_path.exists():
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' \
+                   if file_info['file_type'] == 'excel' else 'text/csv'
+        
+        try:
+            return send_file(
+                file_path,
+                as_attachment=True,
+                download_name=file_info['original_name'],
+                mimetype=mimetype,
+                conditional=True,
+                max_age=DOWNLOAD_MAX_AGE
+            )
+        except FileNotFoundError:
             return jsonify({
                 'success': False,
                 'error': 'File not found on disk'
             }), 404
         
-        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' \
-                   if file_info['file_type'] == 'excel' else 'text/csv'
-        
-        return send_file(
-            file_path,
-            as_attachment=True,
-            download_name=file_info['original_name'],
-            mimetype=mimetype
-        )
-        
     except Exception as e:
         _log.error(f"Error downloading file: {str(e)}")
         return jsonify({
@@ -749,6 +1282,24 @@ def download_generated_file(file_id):
         }), 500
 
 
+@cache.memoize(timeout=30)
+def _list_generated_files(company_name):
+    """
+    Generated-file listing, cached for 30 seconds.
+
+    Saves and deletes clear the cache only in the worker that handled them:
+    with the default per-process SimpleCache, other workers can serve a
+    listing up to 30 seconds stale. A shared CACHE_TYPE (e.g. RedisCache)
+    makes the invalidation apply to every worker.
+    """
+    return file_manager.list_files(company_name=company_name)
+
+
+def _invalidate_generated_files():
+    """Drop cached listings after the file store changes."""
+    cache.delete_memoized(_list_generated_files)
+
+
 @app.route('/api/list-generated-files', methods=['GET'])
 def list_generated_files():
     """
@@ -760,11 +1311,8 @@ def list_generated_files():
     try:
         company_name = request.args.get('company_name')
         
-        files = file_manager.list_files(company_name=company_name)
-        
-        # Remove stored_path from response for security
-        # for file_info in files:
-            # file_info.pop('stored_path', None)
+        # FileManager.list_files leaves out stored_path
+        files = _list_generated_files(company_name)
         
         return jsonify({
             'success': True,
@@ -785,6 +1333,7 @@ def delete_generated_file(file_id):
     """Delete generated file by ID."""
     try:
         success = file_manager.delete_file(file_id)
+        _invalidate_generated_files()
         
         if success:
             return jsonify({
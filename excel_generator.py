@@ -2,22 +2,41 @@
 Excel/CSV Generator for Financial Data
 Converts JSON financial data to formatted Excel and CSV files
 """
+import errno
 import logging
+import os
+import shutil
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from io import StringIO
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+import xlsxwriter
 import csv
-import json
+import orjson
+import sqlite3
 import uuid
+import threading
 
 _log = logging.getLogger(__name__)
 
+# Cell formats (xlsxwriter properties), added to each workbook once; all cells are bordered
+CELL_FORMATS = {
+    'cell': {'border': 1},
+    'title': {'bold': True, 'font_size': 16, 'bg_color': '#E0E0E0', 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    'period': {'bold': True, 'bg_color': '#E0E0E0', 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    'section': {'bold': True, 'bg_color': '#F0F0F0', 'border': 1},
+    'total_label': {'bold': True, 'border': 1},
+    'value': {'align': 'right', 'border': 1},
+    'total_value': {'bold': True, 'align': 'right', 'border': 1},
+}
+
 
 class FinancialExcelGenerator:
-    """Generate Excel and CSV files from financial JSON data."""
+    """
+    Generate Excel and CSV files from financial JSON data.
+    
+    Keeps no per-call state, so one instance can be shared across request threads.
+    """
     
     # Period mapping: JSON keys to column positions (B=1, C=2, etc.)
     PERIOD_MAPPING = {
@@ -34,17 +53,103 @@ class FinancialExcelGenerator:
         '30.06.2023': ('L', 11, 'Q1 FY 2024', '3M-30th Jun 2023'),
     }
     
+    # (period_key, header, description) in column order, resolved once
+    PERIODS = tuple(
+        (period_key, header, description)
+        for period_key, (_, _, header, description) in sorted(PERIOD_MAPPING.items(), key=lambda x: x[1][1])
+    )
+    PERIOD_KEYS = tuple(period_key for period_key, _, _ in PERIODS)
+    
+    # Statement rows after the three header rows, shared by the Excel and CSV output.
+    # Each entry is (kind, label, key):
+    #   data    - label and values for key
+    #   total   - data row in bold
+    #   section - data row styled as a section header
+    #   heading - section header label with no values
+    #   label   - label with no values
+    #   empty   - spacer row
+    ROW_SCHEMA = (
+        # Row 4-8: Revenue Section
+        ('data', 'Sale of goods / Income from operations Domestic', 'sale_of_goods'),
+        ('data', 'Sale Exports', 'export_sales'),
+        ('data', 'Revenue from Services', 'service_revenue'),
+        ('data', 'Other operating revenues', 'other_operating_revenues'),
+        ('total', 'Total Revenue', 'revenue_from_operations'),
+        
+        # Row 9: Other Income
+        ('data', 'II. Other income', 'other_income'),
+        
+        # Row 10-13: Total Income Section
+        ('data', 'III. Total Income (I+II)', 'total_income'),
+        ('label', 'Sale of Goods Growth YOY', None),
+        ('label', 'Total Revenue Growth YOY', None),
+        ('label', 'Total Income Growth YOY', None),
+        
+        # Row 14: Empty
+        ('empty', None, None),
+        
+        # Row 15-32: Expenses Section
+        ('heading', 'IV. Expenses:', None),
+        ('data', 'Cost of materials consumed', 'cost_of_materials_consumed'),
+        ('data', 'Excise duty', 'excise_duty'),
+        ('data', 'Purchases of stock-in-trade', 'purchases_stock_in_trade'),
+        ('data', 'Changes in inventories of finished goods, work-in-progress and stock-in-trade',
+         'changes_in_inventories'),
+        ('data', 'Employee benefits expense', 'employee_benefits_expense'),
+        ('data', 'Finance costs', 'finance_costs'),
+        ('data', 'Depreciation and amortisation expense', 'depreciation_amortisation_expense'),
+        ('data', 'Other expenses', 'other_expense'),
+        ('data', 'Advertising and promotion', 'advertising_expense'),
+        ('label', 'Others', None),
+        ('data', 'Impairment', 'impairment_losses'),
+        ('label', 'Provision for contingencies', None),
+        ('label', 'Corporate responsibilities', None),
+        ('total', 'Total expenses', 'total_expenses'),
+        ('data', 'PBT before exp items', 'profit_before_exceptional_and_tax'),
+        ('empty', None, None),
+        ('data', 'Exceptional items Gain/(Loss)', 'exceptional_item_expense'),
+        
+        # Row 33: Empty
+        ('empty', None, None),
+        
+        # Row 34-35: Profit Before Tax
+        ('section', 'V. Profit before tax (III-IV)', 'profit_before_tax'),
+        ('label', '%', None),
+        
+        # Row 36: Empty
+        ('empty', None, None),
+        
+        # Row 37-40: Tax Section
+        ('heading', 'VI. Tax expense:', None),
+        ('data', '(i) Current tax', 'current_tax'),
+        ('data', '(ii) Deferred tax/Income Tax of Prior years', 'deferred_tax'),
+        ('total', 'Total Tax', 'total_tax_expense'),
+        
+        # Row 41: Net Profit
+        ('section', 'VII. Profit for the year (V-VI)', 'net_profit'),
+        
+        # Row 42: Empty
+        ('empty', None, None),
+        
+        # Row 43-44: EBITDA
+        ('data', 'EBITDA', 'ebitda'),
+        ('label', 'EBITDA Margin', None),
+        
+        # Row 45: Empty
+        ('empty', None, None),
+        
+        # Row 46-47: Growth Metrics
+        ('label', 'Volume Gr%', None),
+        ('label', 'Price Gr%', None),
+    )
+    VALUE_ROW_KINDS = frozenset(('data', 'total', 'section'))
+    
     # Key aliases - support both naming conventions
     KEY_ALIASES = {
         'sale_of_products': 'sale_of_goods',
         'sale_of_goods': 'sale_of_goods',
     }
     
-    def __init__(self):
-        """Initialize the generator."""
-        self.data_map = {}
-        self.company_name = ""
-    
     def _normalize_key(self, key: str) -> str:
         """Normalize key using aliases."""
         return self.KEY_ALIASES.get(key, key)
@@ -68,381 +173,211 @@ class FinancialExcelGenerator:
         except (ValueError, TypeError):
             return 0.0
     
-    def _format_number(self, value: float, decimal_places: int = 2) -> str:
-        """Format number with Indian comma style and brackets for negatives."""
+    @staticmethod
+    def _format_number(value: float) -> str:
+        """Format number with comma separators, 2 decimals and brackets for negatives ('-' for zero)."""
         if value == 0:
             return '-'
-        
-        # Handle negative numbers
-        is_negative = value < 0
-        abs_value = abs(value)
-        
-        # Format with decimal places
-        formatted = f"{abs_value:,.{decimal_places}f}"
-        
-        # Convert to Indian numbering system (lakhs/crores)
-        # For simplicity, keeping comma format but can be enhanced
-        
-        if is_negative:
-            return f"({formatted})"
-        return formatted
+        # Indian numbering (lakhs/crores) could replace the comma format here
+        if value < 0:
+            return f"({-value:,.2f})"
+        return f"{value:,.2f}"
     
-    def _build_data_map(self, financial_data: List[Dict]) -> None:
-        """Build data map from financial_data array for easy lookup."""
-        self.data_map = {}
+    def _build_data_map(self, financial_data: List[Dict]) -> Dict[str, Dict[str, float]]:
+        """
+        Build data map from financial_data array for easy lookup.
+        
+        Values are parsed to floats for every period up front, so lookups
+        don't re-parse the same strings.
+        """
+        data_map = {}
         
         for item in financial_data:
             key = self._normalize_key(item.get('key', ''))
             values = item.get('values', {})
             
             if key:
-                self.data_map[key] = values
+                data_map[key] = {
+                    period: self._parse_number(values.get(period, ''))
+                    for period in self.PERIOD_KEYS
+                }
+        
+        return data_map
     
-    def _get_value(self, key: str, period: str) -> float:
+    def _get_value(self, data_map: Dict[str, Dict[str, float]], key: str, period: str) -> float:
         """Get numeric value for a key and period."""
-        normalized_key = self._normalize_key(key)
-        
-        if normalized_key in self.data_map:
-            values = self.data_map[normalized_key]
-            value_str = values.get(period, '')
-            return self._parse_number(value_str)
-        
-        return 0.0
+        values = data_map.get(self._normalize_key(key))
+        return values.get(period, 0.0) if values else 0.0
     
-    def _calculate_total(self, keys: List[str], period: str) -> float:
+    def _calculate_total(self, data_map: Dict[str, Dict[str, float]], keys: List[str], period: str) -> float:
         """Calculate total from multiple keys."""
         total = 0.0
         for key in keys:
-            total += self._get_value(key, period)
+            total += self._get_value(data_map, key, period)
         return total
     
-    def _create_excel_headers(self, ws) -> None:
-        """Create Excel headers (rows 1-3)."""
-        # Row 1: Company Name
-        ws.merge_cells('B1:L1')
-        cell = ws['B1']
-        cell.value = self.company_name
-        cell.font = Font(bold=True, size=16)
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
+    def _write_excel_headers(self, ws, formats: Dict, company_name: str) -> None:
+        """Write Excel header rows 1-3 (company name, period headers, descriptions)."""
+        last_col = len(self.PERIODS)
+        
+        # Row 1: Company Name, merged across B1:L1
+        ws.write_blank(0, 0, None, formats['cell'])
+        ws.merge_range(0, 1, 0, last_col, '', formats['title'])
+        ws.write_string(0, 1, company_name, formats['title'])
         
         # Row 2: Period Headers
-        ws['A2'] = 'INR Crs'
-        for period_key, (col_letter, _, header, _) in self.PERIOD_MAPPING.items():
-            cell = ws[f'{col_letter}2']
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
+        ws.write_string(1, 0, 'INR Crs', formats['cell'])
+        for col, (_, header, _) in enumerate(self.PERIODS, 1):
+            ws.write_string(1, col, header, formats['period'])
         
         # Row 3: Period Descriptions
-        ws['A3'] = 'I. Revenue from operations'
-        ws['A3'].font = Font(bold=True)
-        ws['A3'].fill = PatternFill(start_color='F0F0F0', end_color='F0F0F0', fill_type='solid')
-        
-        for period_key, (col_letter, _, _, description) in self.PERIOD_MAPPING.items():
-            cell = ws[f'{col_letter}3']
-            cell.value = description
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
+        ws.write_string(2, 0, 'I. Revenue from operations', formats['section'])
+        for col, (_, _, description) in enumerate(self.PERIODS, 1):
+            ws.write_string(2, col, description, formats['period'])
     
-    def _apply_cell_borders(self, ws, row: int, start_col: str = 'A', end_col: str = 'L') -> None:
-        """Apply thin borders to cells in a row."""
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        for col in range(ord(start_col), ord(end_col) + 1):
-            cell = ws[f'{chr(col)}{row}']
-            cell.border = thin_border
+    def _iter_rows(self, data_map: Dict[str, Dict[str, float]]) -> Iterator[Tuple[str, Optional[str], Optional[List[str]]]]:
+        """Yield (kind, label, values) for each ROW_SCHEMA row; values is None for rows without data."""
+        missing = ['-'] * len(self.PERIOD_KEYS)
+        for kind, label, key in self.ROW_SCHEMA:
+            if kind in self.VALUE_ROW_KINDS:
+                parsed = data_map.get(self._normalize_key(key))
+                if parsed is None:
+                    yield kind, label, list(missing)
+                    continue
+                yield kind, label, [self._format_number(parsed[period]) for period in self.PERIOD_KEYS]
+            else:
+                yield kind, label, None
     
-    def _apply_total_style(self, ws, row: int) -> None:
-        """Apply total line styling (bold, double bottom border)."""
-        for col in 'ABCDEFGHIJKL':
-            cell = ws[f'{col}{row}']
-            cell.font = Font(bold=True)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='double')
-            )
+    def _write_excel_row(self, ws, formats: Dict, row_idx: int, kind: str, label: Optional[str],
+                         values: Optional[List[str]]) -> None:
+        """Write the styled cells for one schema row."""
+        if kind in ('heading', 'section'):
+            label_format = formats['section']
+        elif kind == 'total':
+            label_format = formats['total_label']
+        else:
+            label_format = formats['cell']
+        
+        # write_string/write_blank rather than write(), which would turn
+        # strings that look like formulas or URLs into those types
+        if label is None:
+            ws.write_blank(row_idx, 0, None, label_format)
+        else:
+            ws.write_string(row_idx, 0, label, label_format)
+        
+        if values is None:
+            for col in range(1, len(self.PERIODS) + 1):
+                ws.write_blank(row_idx, col, None, formats['cell'])
+        else:
+            value_format = formats['total_value'] if kind == 'total' else formats['value']
+            for col, text in enumerate(values, 1):
+                ws.write_string(row_idx, col, text, value_format)
     
-    def _set_row_data(self, ws, row: int, label: str, key: str, 
-                      is_total: bool = False, is_section_header: bool = False) -> None:
-        """Set data for a row across all periods."""
-        # Set label
-        ws[f'A{row}'] = label
-        
-        if is_section_header:
-            ws[f'A{row}'].font = Font(bold=True)
-            ws[f'A{row}'].fill = PatternFill(start_color='F0F0F0', end_color='F0F0F0', fill_type='solid')
-        elif is_total:
-            ws[f'A{row}'].font = Font(bold=True)
-        
-        # Set data for each period
-        for period_key, (col_letter, _, _, _) in self.PERIOD_MAPPING.items():
-            value = self._get_value(key, period_key)
-            cell = ws[f'{col_letter}{row}']
-            
-            if value != 0:
-                cell.value = self._format_number(value)
-            else:
-                cell.value = '-'
-            
-            cell.alignment = Alignment(horizontal='right')
-            
-            if is_total:
-                cell.font = Font(bold=True)
-        
-        # Apply borders
-        self._apply_cell_borders(ws, row)
-        
-        if is_total:
-            self._apply_total_style(ws, row)
+    @staticmethod
+    def _csv_row(kind: str, label: Optional[str], values: Optional[List[str]]) -> List[str]:
+        """Create the CSV cells for one schema row."""
+        if kind == 'empty':
+            return [''] * 12
+        if values is None:
+            return [label] + ['-'] * 11
+        return [label] + values
     
-    def generate_excel(self, json_data: Dict, output_path: Path) -> bool:
+    def generate_excel(self, json_data: Dict, output_path: Union[Path, BinaryIO]) -> bool:
         """
         Generate Excel file from JSON financial data.
         
+        The workbook is written with xlsxwriter in constant_memory mode: rows
+        are written strictly top to bottom and flushed as each one completes.
+        
         Args:
             json_data: Financial data in JSON format
-            output_path: Path to save Excel file
+            output_path: Path to save Excel file, or a binary file object (e.g. BytesIO)
         
         Returns:
             True if successful, False otherwise
         """
         try:
             # Extract data
-            self.company_name = json_data.get('company_name', 'Financial Statement')
+            company_name = json_data.get('company_name', 'Financial Statement')
             financial_data = json_data.get('financial_data', [])
-            print(f"JSON data: {json_data}")  # Debugging line
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug("Generating Excel for %s with %d line items", company_name, len(financial_data))
             
             # Build data map
-            self._build_data_map(financial_data)
+            data_map = self._build_data_map(financial_data)
             
             # Create workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Financial Statement"
+            target = output_path if hasattr(output_path, 'write') else str(output_path)
+            wb = xlsxwriter.Workbook(target, {'constant_memory': True})
+            ws = wb.add_worksheet("Financial Statement")
+            formats = {name: wb.add_format(props) for name, props in CELL_FORMATS.items()}
             
             # Set column widths
-            ws.column_dimensions['A'].width = 60
-            for col in 'BCDEFGHIJKL':
-                ws.column_dimensions[col].width = 15
-            
-            # Create headers (rows 1-3)
-            self._create_excel_headers(ws)
-            
-            # Row 4-8: Revenue Section
-            self._set_row_data(ws, 4, 'Sale of goods / Income from operations Domestic', 'sale_of_goods')
-            self._set_row_data(ws, 5, 'Sale Exports', 'export_sales')
-            self._set_row_data(ws, 6, 'Revenue from Services', 'service_revenue')
-            self._set_row_data(ws, 7, 'Other operating revenues', 'other_operating_revenues')
-            self._set_row_data(ws, 8, 'Total Revenue', 'revenue_from_operations', is_total=True)
-            
-            # Row 9: Other Income
-            self._set_row_data(ws, 9, 'II. Other income', 'other_income')
-            
-            # Row 10-13: Total Income Section
-            self._set_row_data(ws, 10, 'III. Total Income (I+II)', 'total_income')
-            ws['A11'] = 'Sale of Goods Growth YOY'
-            ws['A12'] = 'Total Revenue Growth YOY'
-            ws['A13'] = 'Total Income Growth YOY'
-            
-            # Row 14: Empty
-            
-            # Row 15-32: Expenses Section
-            ws['A15'] = 'IV. Expenses:'
-            ws['A15'].font = Font(bold=True)
-            ws['A15'].fill = PatternFill(start_color='F0F0F0', end_color='F0F0F0', fill_type='solid')
-            
-            self._set_row_data(ws, 16, 'Cost of materials consumed', 'cost_of_materials_consumed')
-            self._set_row_data(ws, 17, 'Excise duty', 'excise_duty')
-            self._set_row_data(ws, 18, 'Purchases of stock-in-trade', 'purchases_stock_in_trade')
-            self._set_row_data(ws, 19, 'Changes in inventories of finished goods, work-in-progress and stock-in-trade', 
-                              'changes_in_inventories')
-            self._set_row_data(ws, 20, 'Employee benefits expense', 'employee_benefits_expense')
-            self._set_row_data(ws, 21, 'Finance costs', 'finance_costs')
-            self._set_row_data(ws, 22, 'Depreciation and amortisation expense', 'depreciation_amortisation_expense')
-            self._set_row_data(ws, 23, 'Other expenses', 'other_expense')
-            self._set_row_data(ws, 24, 'Advertising and promotion', 'advertising_expense')
-            ws['A25'] = 'Others'
-            self._set_row_data(ws, 26, 'Impairment', 'impairment_losses')
-            ws['A27'] = 'Provision for contingencies'
-            ws['A28'] = 'Corporate responsibilities'
-            self._set_row_data(ws, 29, 'Total expenses', 'total_expenses', is_total=True)
-            self._set_row_data(ws, 30, 'PBT before exp items', 'profit_before_exceptional_and_tax')
-            # Row 31: Empty
-            self._set_row_data(ws, 32, 'Exceptional items Gain/(Loss)', 'exceptional_item_expense')
-            
-            # Row 33: Empty
-            
-            # Row 34-35: Profit Before Tax
-            self._set_row_data(ws, 34, 'V. Profit before tax (III-IV)', 'profit_before_tax', is_section_header=True)
-            ws['A35'] = '%'
-            
-            # Row 36: Empty
-            
-            # Row 37-40: Tax Section
-            ws['A37'] = 'VI. Tax expense:'
-            ws['A37'].font = Font(bold=True)
-            ws['A37'].fill = PatternFill(start_color='F0F0F0', end_color='F0F0F0', fill_type='solid')
-            
-            self._set_row_data(ws, 38, '(i) Current tax', 'current_tax')
-            self._set_row_data(ws, 39, '(ii) Deferred tax/Income Tax of Prior years', 'deferred_tax')
-            self._set_row_data(ws, 40, 'Total Tax', 'total_tax_expense', is_total=True)
-            
-            # Row 41: Net Profit
-            self._set_row_data(ws, 41, 'VII. Profit for the year (V-VI)', 'net_profit', is_section_header=True)
-            
-            # Row 42: Empty
-            
-            # Row 43-44: EBITDA
-            self._set_row_data(ws, 43, 'EBITDA', 'ebitda')
-            ws['A44'] = 'EBITDA Margin'
+            ws.set_column(0, 0, 60)
+            ws.set_column(1, len(self.PERIODS), 15)
             
-            # Row 45: Empty
-            
-            # Row 46-47: Growth Metrics
-            ws['A46'] = 'Volume Gr%'
-            ws['A47'] = 'Price Gr%'
-            
-            # Apply borders to all used cells
-            for row in range(1, 48):
-                self._apply_cell_borders(ws, row)
+            self._write_excel_headers(ws, formats, company_name)
+            for row_idx, row in enumerate(self._iter_rows(data_map), 3):
+                self._write_excel_row(ws, formats, row_idx, *row)
             
             # Save workbook
-            wb.save(output_path)
-            _log.info(f"Excel file generated: {output_path}")
+            wb.close()
+            _log.info(f"Excel file generated: {'in memory' if hasattr(output_path, 'write') else output_path}")
             return True
             
         except Exception as e:
             _log.error(f"Error generating Excel: {e}", exc_info=True)
             return False
     
-    def generate_csv(self, json_data: Dict, output_path: Path) -> bool:
+    def generate_csv(self, json_data: Dict, output_path: Union[Path, TextIO]) -> bool:
         """
         Generate CSV file from JSON financial data.
         
         Args:
             json_data: Financial data in JSON format
-            output_path: Path to save CSV file
+            output_path: Path to save CSV file, or a text file object (e.g. StringIO)
         
         Returns:
             True if successful, False otherwise
         """
         try:
             # Extract data
-            self.company_name = json_data.get('company_name', 'Financial Statement')
+            company_name = json_data.get('company_name', 'Financial Statement')
             financial_data = json_data.get('financial_data', [])
             
             # Build data map
-            self._build_data_map(financial_data)
+            data_map = self._build_data_map(financial_data)
             
             # Prepare rows
             rows = []
             
             # Row 1: Company Name
-            row1 = [''] + [self.company_name] + [''] * 10
+            row1 = [''] + [company_name] + [''] * 10
             rows.append(row1)
             
             # Row 2: Period Headers
-            row2 = ['INR Crs']
-            for period_key, (_, _, header, _) in sorted(self.PERIOD_MAPPING.items(), 
-                                                        key=lambda x: x[1][1]):
-                row2.append(header)
+            row2 = ['INR Crs'] + [header for _, header, _ in self.PERIODS]
             rows.append(row2)
             
             # Row 3: Period Descriptions
-            row3 = ['I. Revenue from operations']
-            for period_key, (_, _, _, description) in sorted(self.PERIOD_MAPPING.items(), 
-                                                             key=lambda x: x[1][1]):
-                row3.append(description)
+            row3 = ['I. Revenue from operations'] + [description for _, _, description in self.PERIODS]
             rows.append(row3)
             
-            # Helper function to create data row
-            def create_row(label: str, key: str) -> List[str]:
-                row = [label]
-                for period_key, (_, _, _, _) in sorted(self.PERIOD_MAPPING.items(), 
-                                                       key=lambda x: x[1][1]):
-                    value = self._get_value(key, period_key)
-                    if value != 0:
-                        row.append(self._format_number(value))
-                    else:
-                        row.append('-')
-                return row
-            
-            # Add all rows according to structure
-            rows.append(create_row('Sale of goods / Income from operations Domestic', 'sale_of_goods'))
-            rows.append(create_row('Sale Exports', 'export_sales'))
-            rows.append(create_row('Revenue from Services', 'service_revenue'))
-            rows.append(create_row('Other operating revenues', 'other_operating_revenues'))
-            rows.append(create_row('Total Revenue', 'revenue_from_operations'))
-            
-            rows.append(create_row('II. Other income', 'other_income'))
-            
-            rows.append(create_row('III. Total Income (I+II)', 'total_income'))
-            rows.append(['Sale of Goods Growth YOY'] + ['-'] * 11)
-            rows.append(['Total Revenue Growth YOY'] + ['-'] * 11)
-            rows.append(['Total Income Growth YOY'] + ['-'] * 11)
-            
-            rows.append([''] * 12)  # Empty row
-            
-            rows.append(['IV. Expenses:'] + ['-'] * 11)
-            rows.append(create_row('Cost of materials consumed', 'cost_of_materials_consumed'))
-            rows.append(create_row('Excise duty', 'excise_duty'))
-            rows.append(create_row('Purchases of stock-in-trade', 'purchases_stock_in_trade'))
-            rows.append(create_row('Changes in inventories of finished goods, work-in-progress and stock-in-trade', 
-                                  'changes_in_inventories'))
-            rows.append(create_row('Employee benefits expense', 'employee_benefits_expense'))
-            rows.append(create_row('Finance costs', 'finance_costs'))
-            rows.append(create_row('Depreciation and amortisation expense', 'depreciation_amortisation_expense'))
-            rows.append(create_row('Other expenses', 'other_expense'))
-            rows.append(create_row('Advertising and promotion', 'advertising_expense'))
-            rows.append(['Others'] + ['-'] * 11)
-            rows.append(create_row('Impairment', 'impairment_losses'))
-            rows.append(['Provision for contingencies'] + ['-'] * 11)
-            rows.append(['Corporate responsibilities'] + ['-'] * 11)
-            rows.append(create_row('Total expenses', 'total_expenses'))
-            rows.append(create_row('PBT before exp items', 'profit_before_exceptional_and_tax'))
-            rows.append([''] * 12)  # Empty row
-            rows.append(create_row('Exceptional items Gain/(Loss)', 'exceptional_item_expense'))
-            
-            rows.append([''] * 12)  # Empty row
-            
-            rows.append(create_row('V. Profit before tax (III-IV)', 'profit_before_tax'))
-            rows.append(['%'] + ['-'] * 11)
-            
-            rows.append([''] * 12)  # Empty row
+            rows.extend(self._csv_row(*row) for row in self._iter_rows(data_map))
             
-            rows.append(['VI. Tax expense:'] + ['-'] * 11)
-            rows.append(create_row('(i) Current tax', 'current_tax'))
-            rows.append(create_row('(ii) Deferred tax/Income Tax of Prior years', 'deferred_tax'))
-            rows.append(create_row('Total Tax', 'total_tax_expense'))
-            
-            rows.append(create_row('VII. Profit for the year (V-VI)', 'net_profit'))
-            
-            rows.append([''] * 12)  # Empty row
-            
-            rows.append(create_row('EBITDA', 'ebitda'))
-            rows.append(['EBITDA Margin'] + ['-'] * 11)
-            
-            rows.append([''] * 12)  # Empty row
-            
-            rows.append(['Volume Gr%'] + ['-'] * 11)
-            rows.append(['Price Gr%'] + ['-'] * 11)
+            # Assemble the whole body in memory with csv.writer and write it once
+            buffer = StringIO(newline='')
+            csv.writer(buffer).writerows(rows)
+            body = buffer.getvalue()
             
             # Write CSV
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerows(rows)
-            
-            _log.info(f"CSV file generated: {output_path}")
+            if hasattr(output_path, 'write'):
+                output_path.write(body)
+                _log.info("CSV generated in memory")
+            else:
+                with open(output_path, 'w', newline='', encoding='utf-8') as f:
+                    f.write(body)
+                _log.info(f"CSV file generated: {output_path}")
             return True
             
         except Exception as e:
@@ -453,41 +388,103 @@ class FinancialExcelGenerator:
 class FileManager:
     """Manage generated Excel/CSV files with metadata."""
     
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            file_id TEXT PRIMARY KEY,
+            company_name TEXT NOT NULL,
+            file_type TEXT NOT NULL,
+            original_name TEXT NOT NULL,
+            stored_path TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            download_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_company ON files (company_name COLLATE NOCASE, created_at);
+        CREATE INDEX IF NOT EXISTS idx_files_created ON files (created_at);
+    """
+    
+    # Columns returned by list_files; stored_path is internal to the server
+    LIST_COLUMNS = "file_id, company_name, file_type, original_name, created_at, file_size, download_count"
+    
+    # UPDATE ... RETURNING needs SQLite 3.35+
+    HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+    
     def __init__(self, storage_dir: Path):
         """
         Initialize file manager.
         
+        Metadata lives in a SQLite database (storage_dir/files.db) so lookups
+        are indexed. The schema is created here with a short-lived connection;
+        each process then opens its own connection on first use, since a
+        SQLite connection must not be carried across fork() (gunicorn's
+        preload_app creates this object in the master before forking workers).
+        An existing metadata.json is imported on first start.
+        
         Args:
             storage_dir: Directory to store files and metadata
         """
         self.storage_dir = storage_dir
         self.storage_dir.mkdir(parents=True, exist_ok=True)
-        self.metadata_file = storage_dir / 'metadata.json'
-        self.metadata = self._load_metadata()
+        self.db_path = storage_dir / 'files.db'
+        # One connection per process shared by its request threads; the lock serialises its use
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        
+        db = self._connect()
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(self.SCHEMA)
+            self._import_json_metadata(db, storage_dir / 'metadata.json')
+        finally:
+            db.close()
     
-    def _load_metadata(self) -> Dict:
-        """Load metadata from disk."""
-        if self.metadata_file.exists():
-            try:
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                _log.error(f"Error loading metadata: {e}")
-                return {}
-        return {}
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection to the metadata database."""
+        db = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
     
-    def _save_metadata(self) -> None:
-        """Save metadata to disk."""
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """This process's connection, opened on first use and again in a forked child."""
+        pid = os.getpid()
+        if self._conn_pid != pid:
+            with self._lock:
+                if self._conn_pid != pid:
+                    # A connection inherited from the parent is dropped, never used or closed here
+                    self._conn = self._connect()
+                    self._conn_pid = pid
+        return self._conn
+    
+    @staticmethod
+    def _import_json_metadata(db: sqlite3.Connection, metadata_file: Path) -> None:
+        """Move entries from the legacy metadata.json store into the database."""
+        if not metadata_file.exists():
+            return
         try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2)
+            metadata = orjson.loads(metadata_file.read_bytes())
+            entries = [{'stored_path': '', 'download_count': 0, **entry} for entry in metadata.values()]
+            db.executemany(
+                "INSERT OR IGNORE INTO files VALUES "
+                "(:file_id, :company_name, :file_type, :original_name, :stored_path, "
+                ":created_at, :file_size, :download_count)",
+                entries
+            )
+            metadata_file.rename(metadata_file.with_suffix('.json.migrated'))
+            _log.info(f"Imported {len(metadata)} entries from {metadata_file}")
         except Exception as e:
-            _log.error(f"Error saving metadata: {e}")
+            _log.error(f"Error importing metadata: {e}")
     
     def save_file(self, file_path: Path, company_name: str, file_type: str) -> str:
         """
         Save file and create metadata entry.
         
+        The file is moved into storage: renamed when it is on the same
+        filesystem, otherwise copied to a temporary name inside storage and
+        then renamed, so the final name never holds a partial file.
+        
         Args:
             file_path: Path to the generated file
             company_name: Company name
@@ -500,27 +497,31 @@ class FileManager:
         timestamp = datetime.now().isoformat()
         file_size = file_path.stat().st_size
         
-        # Copy file to storage with unique name
+        # Move file to storage with unique name
         extension = '.xlsx' if file_type == 'excel' else '.csv'
         stored_path = self.storage_dir / f"{file_id}{extension}"
         
-        import shutil
-        shutil.copy2(file_path, stored_path)
+        try:
+            os.replace(file_path, stored_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            partial_path = stored_path.with_name(f".{stored_path.name}.part")
+            try:
+                shutil.copy2(file_path, partial_path)
+                os.replace(partial_path, stored_path)
+            except BaseException:
+                partial_path.unlink(missing_ok=True)
+                raise
+            file_path.unlink(missing_ok=True)
         
         # Create metadata
-        self.metadata[file_id] = {
-            'file_id': file_id,
-            'company_name': company_name,
-            'file_type': file_type,
-            'original_name': file_path.name,
-            'stored_path': str(stored_path),
-            'created_at': timestamp,
-            'file_size': file_size,
-            'download_count': 0,
-            'stored_path': str(stored_path)
-        }
-        
-        self._save_metadata()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (file_id, company_name, file_type, file_path.name, str(stored_path), timestamp, file_size)
+            )
+        
         _log.info(f"File saved with ID: {file_id}")
         
         return file_id
@@ -535,11 +536,20 @@ class FileManager:
         Returns:
             File metadata or None if not found
         """
-        if file_id in self.metadata:
-            self.metadata[file_id]['download_count'] += 1
-            self._save_metadata()
-            return self.metadata[file_id]
-        return None
+        with self._lock:
+            if self.HAS_RETURNING:
+                row = self._db.execute(
+                    "UPDATE files SET download_count = download_count + 1 WHERE file_id = ? RETURNING *",
+                    (file_id,)
+                ).fetchone()
+            else:
+                cursor = self._db.execute(
+                    "UPDATE files SET download_count = download_count + 1 WHERE file_id = ?", (file_id,)
+                )
+                row = None if cursor.rowcount == 0 else self._db.execute(
+                    "SELECT * FROM files WHERE file_id = ?", (file_id,)
+                ).fetchone()
+        return dict(row) if row is not None else None
     
     def list_files(self, company_name: Optional[str] = None) -> List[Dict]:
         """
@@ -549,17 +559,21 @@ class FileManager:
             company_name: Filter by company name (optional)
         
         Returns:
-            List of file metadata
+            List of file metadata (without stored_path), newest first
         """
-        files = list(self.metadata.values())
-        
-        if company_name:
-            files = [f for f in files if f['company_name'].upper() == company_name.upper()]
-        
-        # Sort by creation date (newest first)
-        files.sort(key=lambda x: x['created_at'], reverse=True)
+        with self._lock:
+            if company_name:
+                rows = self._db.execute(
+                    f"SELECT {self.LIST_COLUMNS} FROM files WHERE company_name = ? COLLATE NOCASE "
+                    "ORDER BY created_at DESC",
+                    (company_name,)
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    f"SELECT {self.LIST_COLUMNS} FROM files ORDER BY created_at DESC"
+                ).fetchall()
         
-        return files
+        return [dict(row) for row in rows]
     
     def delete_file(self, file_id: str) -> bool:
         """
@@ -571,24 +585,24 @@ class FileManager:
         Returns:
             True if successful, False otherwise
         """
-        if file_id in self.metadata:
+        with self._lock:
+            row = self._db.execute("SELECT stored_path FROM files WHERE file_id = ?", (file_id,)).fetchone()
+            if row is None:
+                return False
             try:
                 # Delete physical file
-                stored_path = Path(self.metadata[file_id]['stored_path'])
+                stored_path = Path(row['stored_path'])
                 if stored_path.exists():
                     stored_path.unlink()
                 
                 # Remove metadata
-                del self.metadata[file_id]
-                self._save_metadata()
+                self._db.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
                 
                 _log.info(f"File deleted: {file_id}")
                 return True
             except Exception as e:
                 _log.error(f"Error deleting file: {e}")
                 return False
-        
-        return False
     
     def cleanup_old_files(self, days: int = 30) -> int:
         """
@@ -603,17 +617,30 @@ class FileManager:
         from datetime import timedelta
         
         cutoff_date = datetime.now() - timedelta(days=days)
-        deleted_count = 0
         
-        files_to_delete = []
-        for file_id, metadata in self.metadata.items():
-            created_at = datetime.fromisoformat(metadata['created_at'])
-            if created_at < cutoff_date:
-                files_to_delete.append(file_id)
-        
-        for file_id in files_to_delete:
-            if self.delete_file(file_id):
-                deleted_count += 1
+        # ISO timestamps compare correctly as strings
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT file_id, stored_path FROM files WHERE created_at < ?", (cutoff_date.isoformat(),)
+            ).fetchall()
+            
+            deleted_ids = []
+            for row in rows:
+                try:
+                    Path(row['stored_path']).unlink(missing_ok=True)
+                    deleted_ids.append((row['file_id'],))
+                except Exception as e:
+                    _log.error(f"Error deleting file {row['file_id']}: {e}")
+            
+            # Remove all metadata rows in one transaction
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("DELETE FROM files WHERE file_id = ?", deleted_ids)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        deleted_count = len(deleted_ids)
         
         _log.info(f"Cleaned up {deleted_count} old files")
         return deleted_count
@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for the Financial Document Parser API.
+
+Threaded workers let slow requests (PDF parsing, OpenAI calls) wait on I/O
+without blocking other requests. Values can be overridden via environment
+variables.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Each worker process loads its own Docling models, so keep the process count
+# low and scale concurrency with threads. Background parse job state is kept
+# in files under output/, so any worker can answer /api/parse/status.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Import the app (config, supported companies, AI client) once in the master;
+# workers inherit it copy-on-write instead of each re-importing it. Nothing
+# that must not cross fork() is opened at import: FileManager connects to
+# SQLite lazily in each worker.
+preload_app = True
+
+# Worker recycling is off by default: background parses run inside the
+# worker, status polls count as requests, and a recycle would stop parses
+# still running after graceful_timeout (they are then reported as failed).
+# Set GUNICORN_MAX_REQUESTS to bound memory growth from the PDF libraries
+# only if async parsing is not used or the occasional failed job is acceptable.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 10))
+
+# PDF parsing and AI extraction can take minutes
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
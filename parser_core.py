@@ -1,24 +1,27 @@
 """
 Core parsing functions extracted from service.py for reusability.
 """
+from __future__ import annotations
+
+import hashlib
 import logging
-import json
+import os
 from pathlib import Path
-from pypdf import PdfReader
+import pypdfium2 as pdfium
 import re
-import pandas as pd
-from bs4 import BeautifulSoup
-
-from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
-from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import (
-    PdfPipelineOptions,
-    EasyOcrOptions,
-    TableFormerMode
-)
-from docling.datamodel.settings import settings
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING
+import lxml.html
+import orjson
+from rapidfuzz import fuzz, process
+
+# docling (torch, EasyOCR, TableFormer) and pandas are imported where a PDF is
+# converted, so load_config / parse_html_table_to_json callers don't pay for them
+if TYPE_CHECKING:
+    import pandas as pd
+    from docling.document_converter import DocumentConverter
+    from docling.datamodel.pipeline_options import TableFormerMode
 
 _log = logging.getLogger(__name__)
 
@@ -37,58 +40,233 @@ TARGET_HEADINGS_GENERIC = [
     r"sfatement of unaudiтed.*financial.*re5ulтs.*for тне quarter ended.*]une.*30,.*2025",
 ]
 
+# Each group fused into one alternation so a page is scanned once per group
+_STANDALONE_HEADING_RE = re.compile("|".join(f"(?:{p})" for p in TARGET_HEADINGS_WITH_STANDALONE))
+_GENERIC_HEADING_RE = re.compile("|".join(f"(?:{p})" for p in TARGET_HEADINGS_GENERIC))
+
+# Target-page scan results by PDF content digest: {digest: (page_index, text_length)}
+_TARGET_PAGE_CACHE: dict = {}
+_TARGET_PAGE_CACHE_LOCK = threading.Lock()
+TARGET_PAGE_CACHE_SIZE = 128
+HASH_CHUNK_SIZE = 1 << 20
+
 
 def find_target_page(pdf_path: Path) -> int | None:
     """Return page index containing the Standalone (not Consolidated) Unaudited Q1/Q2 June 2025 results."""
-    reader = PdfReader(str(pdf_path))
-
-    for page_index, page in enumerate(reader.pages):
-        text = page.extract_text() or ""
-        text_lower = text.lower()
-
-        # First, try patterns that explicitly mention "standalone"
-        for pattern in TARGET_HEADINGS_WITH_STANDALONE:
-            if re.search(pattern, text_lower):
-                _log.info(f"Page {page_index + 1}: Found STANDALONE financial results (explicit)")
-                return page_index
-
-        # If no explicit standalone, check generic patterns
-        # but ONLY if the page does NOT contain "consolidated"
-        if "consolidated" not in text_lower:
-            for pattern in TARGET_HEADINGS_GENERIC:
-                if re.search(pattern, text_lower):
-                    _log.info(f"Page {page_index + 1}: Found financial results (no consolidated keyword, assuming standalone)")
-                    return page_index
-        else:
-            _log.info(f"Page {page_index + 1}: Skipping - contains 'consolidated' keyword")
+    return _cached_target_page_scan(pdf_path)[0]
+
+
+def _cached_target_page_scan(pdf_path: Path) -> tuple[int | None, int]:
+    """_scan_for_target_page, memoized on the PDF's content so re-uploads of the same file skip the scan."""
+    # Keyed on content rather than path: every upload is staged under a new path.
+    # Hashed in chunks so a large report isn't held in memory just for the key.
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    digest = hasher.digest()
+    
+    with _TARGET_PAGE_CACHE_LOCK:
+        scan = _TARGET_PAGE_CACHE.get(digest)
+    if scan is None:
+        scan = _scan_for_target_page(pdf_path)
+        with _TARGET_PAGE_CACHE_LOCK:
+            # Another thread may have stored the same PDF meanwhile; don't evict for it
+            if digest not in _TARGET_PAGE_CACHE and len(_TARGET_PAGE_CACHE) >= TARGET_PAGE_CACHE_SIZE:
+                # Drop the oldest entry
+                del _TARGET_PAGE_CACHE[next(iter(_TARGET_PAGE_CACHE))]
+            _TARGET_PAGE_CACHE[digest] = scan
+    return scan
+
+
+_PDFIUM_FALLBACK_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _pdfium_lock() -> threading.Lock:
+    """The process-wide pypdfium2 lock: docling's when it has one, else a module lock."""
+    try:
+        from docling.utils.locks import pypdfium2_lock
+    except ImportError:
+        return _PDFIUM_FALLBACK_LOCK
+    return pypdfium2_lock
+
+
+def _scan_for_target_page(pdf_path: Path) -> tuple[int | None, int]:
+    """find_target_page, also returning how many characters of text the matched page's text layer has."""
+    # PDFium is not thread-safe; share docling's lock so the scan never overlaps
+    # a conversion (its backend is pypdfium2 too) running on another thread
+    with _pdfium_lock():
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        try:
+            for page_index in range(len(pdf)):
+                page = pdf[page_index]
+                try:
+                    textpage = page.get_textpage()
+                    text = textpage.get_text_range() or ""
+                    textpage.close()
+                finally:
+                    page.close()
+                text_lower = text.lower()
+
+                # Every heading pattern needs "2025" and "june" (or OCR'd "]une"); skip pages lacking them
+                if "2025" not in text_lower or ("june" not in text_lower and "]une" not in text_lower):
+                    continue
+
+                # First, try patterns that explicitly mention "standalone"
+                if _STANDALONE_HEADING_RE.search(text_lower):
+                    _log.info(f"Page {page_index + 1}: Found STANDALONE financial results (explicit)")
+                    return page_index, len(text.strip())
+
+                # If no explicit standalone, check generic patterns
+                # but ONLY if the page does NOT contain "consolidated"
+                if "consolidated" not in text_lower:
+                    if _GENERIC_HEADING_RE.search(text_lower):
+                        _log.info(f"Page {page_index + 1}: Found financial results (no consolidated keyword, assuming standalone)")
+                        return page_index, len(text.strip())
+                else:
+                    _log.info(f"Page {page_index + 1}: Skipping - contains 'consolidated' keyword")
+        finally:
+            pdf.close()
+
+        return None, 0
+
+
+class _PunctuationTable(dict):
+    r"""str.translate table deleting every char matched by [^\w\s], filled lazily per codepoint."""
+
+    def __missing__(self, codepoint):
+        value = None if _NON_WORD_RE.match(chr(codepoint)) else codepoint
+        self[codepoint] = value
+        return value
+
+
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_PUNCT_TABLE = _PunctuationTable()
+
+# Token-set similarity fallback for labels the substring check misses
+FUZZY_SCORE_CUTOFF = 80
+FUZZY_MIN_LABEL_LENGTH = 8
+# The best-scoring row must beat the runner-up by this much, or the label is ambiguous
+FUZZY_MIN_MARGIN = 5
+
+# Each keyword present in a candidate table adds to its score
+FINANCIAL_KEYWORDS = (
+    'revenue', 'income', 'expense', 'profit', 'loss', 'tax',
+    'total', 'net', 'eps', 'earnings per share', 'comprehensive',
+    'depreciation', 'amortisation', 'finance cost'
+)
+
+# Any digit; only presence is scored in _select_best_table
+_HAS_NUMBERS_RE = re.compile(r'\d')
+
+# A table scoring above this (e.g. 50 rows, numbers and 9+ keywords) is taken as the main statement
+CLEAR_WINNER_SCORE = 200
+
+# Table files process_pdf_document can write; HTML (plus the JSON result) is the default
+EXPORT_FORMATS = frozenset({"csv", "html", "md"})
+DEFAULT_EXPORT_FORMATS = frozenset({"html"})
 
-    return None
+# Born-digital PDFs (a real text layer on the target page) can skip OCR and use the
+# FAST TableFormer. Opt-in: config.json tr_numbers were taken from OCR + ACCURATE output.
+FAST_TEXT_PDFS = os.getenv('FAST_TEXT_PDFS', 'False').lower() == 'true'
+TEXT_LAYER_MIN_CHARS = 500
 
+# Docling inference device: AUTO (CUDA or MPS when torch sees one, else CPU), CPU, CUDA or MPS
+ACCELERATOR_DEVICE = os.getenv('ACCELERATOR_DEVICE', 'AUTO').strip().upper()
+NUM_THREADS = int(os.getenv('NUM_THREADS', 8))
 
-def _find_matching_row(rows: list, labels: list) -> tuple[int, any]:
+# (converter, convert lock) keyed on pipeline settings, so model weights stay loaded
+# between documents. The docling pipeline and its torch models aren't documented as
+# re-entrant, so each converter runs one convert() at a time.
+_CONVERTER_CACHE: dict = {}
+_CONVERTER_LOCK = threading.Lock()
+
+
+def _first_table(html_content: str):
+    """Return the first <table> element in an HTML string, or None."""
+    if not html_content.strip():
+        return None
+    return next(lxml.html.fromstring(html_content).iter('table'), None)
+
+
+def _cell_text(element) -> str:
+    """Text of an element with each text node stripped and joined (BeautifulSoup get_text(strip=True))."""
+    return "".join(text.strip() for text in element.itertext())
+
+
+def _row_text(row) -> str:
+    """Space-joined stripped text nodes of a row (BeautifulSoup get_text(separator=' ', strip=True))."""
+    return " ".join(text for text in (text.strip() for text in row.itertext()) if text)
+
+
+def _normalize_row_texts(rows: list) -> list:
+    """Lower-cased, punctuation-stripped text of each row, as _find_matching_row compares it."""
+    return [_row_text(row).lower().translate(_PUNCT_TABLE) for row in rows]
+
+
+def _layout_columns(column_layout: dict) -> tuple[int, list]:
+    """Split a column layout into the label column and (date_key, column) value columns, 0-indexed."""
+    label_col_index = column_layout.get("label", 2) - 1
+    value_cols = [(date_key, col_index - 1) for date_key, col_index in column_layout.items() if date_key != "label"]
+    return label_col_index, value_cols
+
+
+def _find_matching_row(rows: list, row_texts: list, labels: list) -> tuple[int, any]:
     """
     Find row matching any of the given labels using fuzzy matching.
     
+    Args:
+        rows: Table rows
+        row_texts: Normalized text of each row (see _normalize_row_texts)
+        labels: Candidate labels for the item
+    
     Returns:
         Tuple of (row_index, matched_row) or (-1, None)
     """
-    for row_index, row in enumerate(rows):
-        row_text = row.get_text(separator=' ', strip=True).lower()
-        
-        for label in labels:
-            label_lower = label.lower()
-            # Normalize both strings
-            row_normalized = re.sub(r'[^\w\s]', '', row_text)
-            label_normalized = re.sub(r'[^\w\s]', '', label_lower)
-            
+    # Normalize labels once instead of per row
+    normalized_labels = []
+    for label in labels:
+        label_normalized = label.lower().translate(_PUNCT_TABLE)
+        normalized_labels.append((label_normalized, label_normalized[:15]))
+
+    for row_index, (row, row_normalized) in enumerate(zip(rows, row_texts)):
+        for label_normalized, label_prefix in normalized_labels:
             # Check for exact match or fuzzy match
-            if label_normalized in row_normalized or row_normalized.startswith(label_normalized[:15]):
+            if label_normalized in row_normalized or row_normalized.startswith(label_prefix):
                 return row_index, row
+
+    # Nothing matched literally: score rows by sorted-token similarity so reordered
+    # or slightly different wording ("profit/(loss) before tax") still resolves.
+    # token_sort_ratio (unlike token_set_ratio) penalizes extra words, so a label
+    # doesn't score 100 against every longer row containing it ("profit before
+    # tax from discontinued operations"). Number tokens (values, serial numbers)
+    # are dropped from the rows first. Very short labels are skipped.
+    fuzzy_labels = [label for label, _ in normalized_labels if len(label) >= FUZZY_MIN_LABEL_LENGTH]
+    if fuzzy_labels and row_texts:
+        row_words = [" ".join(token for token in text.split() if not token.isdigit()) for text in row_texts]
+        # One labels x rows matrix; scores under the cutoff come back as 0
+        scores = process.cdist(
+            fuzzy_labels, row_words, scorer=fuzz.token_sort_ratio, score_cutoff=FUZZY_SCORE_CUTOFF
+        )
+        best_index, best_score = -1, 0
+        for label_scores in scores:
+            row_index = int(label_scores.argmax())
+            score = label_scores[row_index]
+            if score <= best_score:
+                continue
+            # Skip labels that fit two rows about equally well (near-duplicate rows)
+            label_scores[row_index] = 0
+            if score - label_scores.max() >= FUZZY_MIN_MARGIN:
+                best_index, best_score = row_index, score
+        if best_index >= 0:
+            return best_index, rows[best_index]
     
     return -1, None
 
 
-def parse_html_table_to_json(html_file_path: Path, company_name: str, config: dict, use_fuzzy_matching: bool = True) -> dict:
+def parse_html_table_to_json(html_file_path: Path, company_name: str, config: dict, use_fuzzy_matching: bool = True,
+                             html_content: str = None) -> dict:
     """
     Parse HTML table and create JSON output based on config.
     
@@ -97,6 +275,7 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
         company_name: Company name (must match config keys)
         config: Configuration dictionary
         use_fuzzy_matching: If True, use label matching as fallback when tr_number fails
+        html_content: The file's HTML if already in memory (skips reading html_file_path)
     
     Returns:
         Dictionary with parsed financial data or None on error
@@ -123,24 +302,26 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
         _log.error(f"No configuration found for {config_key}")
         return None
     
-    # Get column layout
-    column_layout_name = company_config.get("column_layout", "standard")
-    column_layout = config["column_layouts"][column_layout_name]
+    # Get column layout; resolved columns are cached per layout name
+    default_layout_name = company_config.get("column_layout", "standard")
+    layout_columns = {default_layout_name: _layout_columns(config["column_layouts"][default_layout_name])}
     
     # Read HTML file
-    with open(html_file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    if html_content is None:
+        with open(html_file_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
     
     # Parse HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
-    table = soup.find('table')
+    table = _first_table(html_content)
     
-    if not table:
+    if table is None:
         _log.error("No table found in HTML file")
         return None
     
     # Extract all rows
-    rows = table.find_all('tr')
+    rows = list(table.iter('tr'))
+    # Normalized row text for label matching, extracted once on first use
+    row_texts = None
     
     # Create result structure
     result = {
@@ -157,13 +338,11 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
         key = item_config["key"]
         labels = item_config["labels"]
         tr_number = item_config.get("tr_number", 0)
-        override_column_layout = item_config.get("column_layout", None)
-
-        if override_column_layout:
-            column_layout = config["column_layouts"][override_column_layout]
-        else:
-            column_layout_name = company_config.get("column_layout", "standard")
-            column_layout = config["column_layouts"][column_layout_name]
+        layout_name = item_config.get("column_layout") or default_layout_name
+        
+        if layout_name not in layout_columns:
+            layout_columns[layout_name] = _layout_columns(config["column_layouts"][layout_name])
+        label_col_index, value_cols = layout_columns[layout_name]
         
         matched_row = None
         
@@ -174,7 +353,9 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
         
         # Strategy 2: Fallback to fuzzy label matching
         elif use_fuzzy_matching and labels:
-            row_index, matched_row = _find_matching_row(rows, labels)
+            if row_texts is None:
+                row_texts = _normalize_row_texts(rows)
+            row_index, matched_row = _find_matching_row(rows, row_texts, labels)
             if matched_row is not None:
                 _log.debug(f"Fuzzy matched '{key}' at row {row_index + 1}")
                 fuzzy_matched_count += 1
@@ -183,26 +364,21 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
         # Extract data if row was found
         if matched_row is not None:
             # Extract values from the row based on column layout
-            cells = matched_row.find_all(['td', 'th'])
+            cells = list(matched_row.iter('td', 'th'))
             
             # Get the label from the label column
-            label_col_index = column_layout.get("label", 2) - 1  # Adjust for 0-indexing
             particular = ""
             if label_col_index < len(cells):
-                particular = cells[label_col_index].get_text(strip=True)
+                particular = _cell_text(cells[label_col_index])
             
             # If particular is empty, try to find it from the labels list
             if not particular:
                 particular = labels[0] if labels else key
             
             values = {}
-            for date_key, col_index in column_layout.items():
-                if date_key == "label":
-                    continue
-                
-                if col_index <= len(cells):
-                    value = cells[col_index - 1].get_text(strip=True)
-                    values[date_key] = value
+            for date_key, col_index in value_cols:
+                if col_index < len(cells):
+                    values[date_key] = _cell_text(cells[col_index])
                 else:
                     values[date_key] = ""
             
@@ -219,56 +395,45 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
     return result
 
 
-def _select_best_table(tables: list, doc_filename: str, output_dir: Path) -> tuple[int, Path]:
+def _select_best_table(html_contents: dict) -> tuple[int, str]:
     """
     Select the best table from multiple extracted tables based on heuristics.
     
+    Args:
+        html_contents: {table_index: html} of the exported tables
+    
     Returns:
-        Tuple of (table_index, html_path) or (0, first_table_path) as fallback
+        Tuple of (table_index, html) or (0, first_table_html) as fallback
     """
-    if not tables:
+    if not html_contents:
         return None, None
     
     best_score = -1
     best_index = 0
     
-    for table_ix, table in enumerate(tables):
+    # Most rows first (counted without parsing) so the scan can stop at a clear winner
+    scan_order = sorted(html_contents, key=lambda ix: (-html_contents[ix].count('<tr'), ix))
+    
+    for table_ix in scan_order:
+        html_content = html_contents[table_ix]
         try:
-            html_path = output_dir / f"{doc_filename}-table-{table_ix + 1}.html"
-            
-            if not html_path.exists():
-                continue
-            
-            # Read and analyze table
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            table_elem = _first_table(html_content)
             
-            soup = BeautifulSoup(html_content, 'html.parser')
-            table_elem = soup.find('table')
-            
-            if not table_elem:
+            if table_elem is None:
                 continue
             
-            rows = table_elem.find_all('tr')
+            rows = list(table_elem.iter('tr'))
             score = 0
             
             # Heuristic 1: More rows generally better (financial statements are detailed)
             score += min(len(rows), 50) * 2
             
             # Heuristic 2: Check for financial keywords
-            table_text = table_elem.get_text().lower()
-            financial_keywords = [
-                'revenue', 'income', 'expense', 'profit', 'loss', 'tax', 
-                'total', 'net', 'eps', 'earnings per share', 'comprehensive',
-                'depreciation', 'amortisation', 'finance cost'
-            ]
-            
-            for keyword in financial_keywords:
-                if keyword in table_text:
-                    score += 10
+            table_text = "".join(table_elem.itertext()).lower()
+            score += 10 * sum(1 for keyword in FINANCIAL_KEYWORDS if keyword in table_text)
             
             # Heuristic 3: Has numeric columns (financial data should have numbers)
-            has_numbers = bool(re.search(r'\d+[,.]?\d*', table_text))
+            has_numbers = bool(_HAS_NUMBERS_RE.search(table_text))
             if has_numbers:
                 score += 20
             
@@ -278,21 +443,85 @@ def _select_best_table(tables: list, doc_filename: str, output_dir: Path) -> tup
             
             _log.debug(f"Table {table_ix + 1} score: {score} (rows: {len(rows)})")
             
-            if score > best_score:
+            # Ties still go to the earliest table
+            if score > best_score or (score == best_score and table_ix < best_index):
                 best_score = score
                 best_index = table_ix
+            
+            if score > CLEAR_WINNER_SCORE:
+                _log.debug(f"Table {table_ix + 1} is a clear winner, skipping remaining tables")
+                break
                 
         except Exception as e:
             _log.warning(f"Error analyzing table {table_ix + 1}: {e}")
             continue
     
-    best_html_path = output_dir / f"{doc_filename}-table-{best_index + 1}.html"
     _log.info(f"Selected table {best_index + 1} with score {best_score}")
-    return best_index, best_html_path
+    return best_index, html_contents[best_index]
+
+
+def _get_converter(num_threads: int, do_ocr: bool,
+                   table_mode: TableFormerMode) -> tuple[DocumentConverter, threading.Lock]:
+    """
+    Return a DocumentConverter for the given pipeline settings, building it once.
+    
+    The PDF pipeline (EasyOCR + TableFormer weights) is initialized on creation,
+    so only the first document per settings pays the model load. The converter
+    is shared by every thread, so callers must hold the returned lock around
+    convert().
+    """
+    from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
+    from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import EasyOcrOptions, PdfPipelineOptions
+    from docling.datamodel.settings import settings
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+    
+    key = (ACCELERATOR_DEVICE, num_threads, do_ocr, table_mode)
+    with _CONVERTER_LOCK:
+        cached = _CONVERTER_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
+        # Configure accelerator (optimized settings)
+        accelerator_options = AcceleratorOptions(
+            num_threads=num_threads, device=AcceleratorDevice[ACCELERATOR_DEVICE]
+        )
+        
+        # Configure pipeline with adaptive settings
+        pipeline_options = PdfPipelineOptions()
+        pipeline_options.accelerator_options = accelerator_options
+        pipeline_options.do_ocr = do_ocr
+        pipeline_options.do_table_structure = True
+        pipeline_options.table_structure_options.mode = table_mode
+        pipeline_options.table_structure_options.do_cell_matching = True
+        
+        ocr_options = EasyOcrOptions(force_full_page_ocr=True)
+        pipeline_options.ocr_options = ocr_options
+        
+        # Create document converter
+        doc_converter = DocumentConverter(
+            format_options={
+                InputFormat.PDF: PdfFormatOption(
+                    pipeline_options=pipeline_options,
+                    backend=PyPdfiumDocumentBackend
+                ),
+            }
+        )
+        
+        # Enable the profiling to measure the time spent
+        settings.debug.profile_pipeline_timings = True
+        
+        _log.info(f"Loading docling PDF pipeline (device={ACCELERATOR_DEVICE}, threads={num_threads}, "
+                  f"ocr={do_ocr}, table_mode={table_mode})")
+        doc_converter.initialize_pipeline(InputFormat.PDF)
+        cached = _CONVERTER_CACHE[key] = (doc_converter, threading.Lock())
+        return cached
 
 
 def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, config: dict, 
-                         prefer_standalone: bool = True, use_fuzzy_matching: bool = True) -> dict:
+                         prefer_standalone: bool = True, use_fuzzy_matching: bool = True,
+                         export_formats=DEFAULT_EXPORT_FORMATS) -> dict:
     """
     Optimized function to process PDF documents with multiple format support.
     
@@ -303,6 +532,8 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
         config: Configuration dictionary with parsing rules
         prefer_standalone: Prefer standalone over consolidated statements
         use_fuzzy_matching: Enable fuzzy label matching as fallback
+        export_formats: Table files to write, any of EXPORT_FORMATS (default: HTML
+            only). HTML is always written since JSON parsing and AI extraction read it
     
     Returns:
         Dictionary with:
@@ -313,12 +544,14 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
         - processing_time: float (seconds)
         - table_info: dict with table selection details
     """
+    from docling.datamodel.pipeline_options import TableFormerMode
+    
     try:
         # Create output directory
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Find target page
-        target_page = find_target_page(pdf_path)
+        target_page, target_text_length = _cached_target_page_scan(pdf_path)
         
         page_range = None
         if target_page is not None:
@@ -328,34 +561,11 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
         else:
             _log.warning("No specific target page found. Will process entire document and select best table.")
         
-        # Configure accelerator (optimized settings)
-        accelerator_options = AcceleratorOptions(
-            num_threads=8, device=AcceleratorDevice.CPU
-        )
-        
-        # Configure pipeline with adaptive settings
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.accelerator_options = accelerator_options
-        pipeline_options.do_ocr = True
-        pipeline_options.do_table_structure = True
-        pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
-        pipeline_options.table_structure_options.do_cell_matching = True
-        
-        ocr_options = EasyOcrOptions(force_full_page_ocr=True)
-        pipeline_options.ocr_options = ocr_options
-        
-        # Create document converter
-        doc_converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(
-                    pipeline_options=pipeline_options,
-                    backend=PyPdfiumDocumentBackend
-                ),
-            }
-        )
-
-        # Enable the profiling to measure the time spent
-        settings.debug.profile_pipeline_timings = True
+        if FAST_TEXT_PDFS and target_page is not None and target_text_length > TEXT_LAYER_MIN_CHARS:
+            _log.info(f"Target page has a text layer ({target_text_length} chars): no OCR, FAST table structure")
+            doc_converter, convert_lock = _get_converter(NUM_THREADS, False, TableFormerMode.FAST)
+        else:
+            doc_converter, convert_lock = _get_converter(NUM_THREADS, True, TableFormerMode.ACCURATE)
         
         # Convert document with retry logic
         conv_res = None
@@ -366,10 +576,12 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
             try:
                 if page_range:
                     _log.info(f"Converting page {page_range[0]} (attempt {retry_count + 1})")
-                    conv_res = doc_converter.convert(pdf_path, page_range=page_range)
+                    with convert_lock:
+                        conv_res = doc_converter.convert(pdf_path, page_range=page_range)
                 else:
                     _log.info(f"Converting entire document (attempt {retry_count + 1})")
-                    conv_res = doc_converter.convert(pdf_path)
+                    with convert_lock:
+                        conv_res = doc_converter.convert(pdf_path)
                     
             except Exception as conv_error:
                 retry_count += 1
@@ -381,6 +593,18 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
                 if page_range is not None:
                     _log.info("Falling back to full document conversion")
                     page_range = None
+                
+                # and always with the full OCR + ACCURATE pipeline
+                doc_converter, convert_lock = _get_converter(NUM_THREADS, True, TableFormerMode.ACCURATE)
+            
+            else:
+                # The target page converted but yielded no table: retry on the whole document
+                if page_range is not None and not conv_res.document.tables and retry_count < max_retries:
+                    retry_count += 1
+                    _log.warning(f"No tables found on page {page_range[0]}. Falling back to full document conversion")
+                    page_range = None
+                    conv_res = None
+                    doc_converter, convert_lock = _get_converter(NUM_THREADS, True, TableFormerMode.ACCURATE)
         
         doc_filename = conv_res.input.file.stem
         output_files = {}
@@ -390,53 +614,62 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
             "selection_method": "default"
         }
         
+        write_csv = "csv" in export_formats
+        write_md = "md" in export_formats
+        html_contents = {}
+        
         # Export all tables
         for table_ix, table in enumerate(conv_res.document.tables):
-            table_df: pd.DataFrame = table.export_to_dataframe(doc=conv_res.document)
+            # The DataFrame is only needed for the CSV/Markdown exports
+            if write_csv or write_md:
+                table_df: pd.DataFrame = table.export_to_dataframe(doc=conv_res.document)
             
             # Save CSV
-            csv_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.csv"
-            table_df.to_csv(csv_filename, encoding='utf-8')
-            output_files[f'csv_{table_ix + 1}'] = str(csv_filename)
+            if write_csv:
+                csv_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.csv"
+                table_df.to_csv(csv_filename, encoding='utf-8')
+                output_files[f'csv_{table_ix + 1}'] = str(csv_filename)
             
-            # Save HTML
+            # Save HTML (kept in memory for table selection)
+            html_content = table.export_to_html(doc=conv_res.document)
+            html_contents[table_ix] = html_content
             html_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.html"
             with html_filename.open("w", encoding='utf-8') as fp:
-                fp.write(table.export_to_html(doc=conv_res.document))
+                fp.write(html_content)
             output_files[f'html_{table_ix + 1}'] = str(html_filename)
             
             # Save Markdown
-            md_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.md"
-            with md_filename.open("w", encoding='utf-8') as fp:
-                fp.write(table_df.to_markdown())
-            output_files[f'md_{table_ix + 1}'] = str(md_filename)
+            if write_md:
+                md_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.md"
+                with md_filename.open("w", encoding='utf-8') as fp:
+                    fp.write(table_df.to_markdown())
+                output_files[f'md_{table_ix + 1}'] = str(md_filename)
         
         # Smart table selection for JSON parsing
         json_result = None
-        selected_html = None
+        selected_ix = None
         
         if len(conv_res.document.tables) > 1:
             # Multiple tables: use heuristics to select best one
             _log.info(f"Found {len(conv_res.document.tables)} tables. Selecting best match...")
-            best_table_ix, selected_html = _select_best_table(
-                conv_res.document.tables, doc_filename, output_dir
-            )
-            if selected_html:
-                table_info["selected_table"] = best_table_ix + 1
-                table_info["selection_method"] = "heuristic"
+            selected_ix, _ = _select_best_table(html_contents)
+            table_info["selected_table"] = selected_ix + 1
+            table_info["selection_method"] = "heuristic"
         elif len(conv_res.document.tables) == 1:
             # Single table: use it
-            selected_html = output_dir / f"{doc_filename}-table-1.html"
+            selected_ix = 0
             table_info["selection_method"] = "single_table"
         
         # Get processing time
         doc_conversion_secs = conv_res.timings["pipeline_total"].times
         
         # Parse selected table and create JSON output
-        if selected_html and selected_html.exists():
+        if selected_ix is not None:
             _log.info(f"Parsing table {table_info['selected_table']} and creating JSON output...")
+            selected_html = output_dir / f"{doc_filename}-table-{selected_ix + 1}.html"
             json_result = parse_html_table_to_json(
-                selected_html, company_name, config, use_fuzzy_matching=use_fuzzy_matching
+                selected_html, company_name, config, use_fuzzy_matching=use_fuzzy_matching,
+                html_content=html_contents[selected_ix]
             )
             
             if json_result:
@@ -451,8 +684,8 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
                 
                 # Save JSON output
                 json_output_path = output_dir / f"{doc_filename}-financial-data.json"
-                with open(json_output_path, 'w', encoding='utf-8') as f:
-                    json.dump(json_result, f, indent=2, ensure_ascii=False)
+                with open(json_output_path, 'wb') as f:
+                    f.write(orjson.dumps(json_result, option=orjson.OPT_INDENT_2))
                 output_files['json'] = str(json_output_path)
                 _log.info(f"Saved JSON output to {json_output_path}")
         
@@ -475,13 +708,19 @@ def process_pdf_document(pdf_path: Path, company_name: str, output_dir: Path, co
         }
 
 
+@lru_cache(maxsize=4)
+def _load_config_cached(config_path: str, mtime_ns: int) -> dict:
+    """Parse a config file; keyed on mtime so edits to the file are picked up."""
+    with open(config_path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
 def load_config(config_path: Path = None) -> dict:
-    """Load configuration from JSON file."""
+    """Load configuration from JSON file (parsed once per file version; treat as read-only)."""
     if config_path is None:
         config_path = Path(__file__).parent / "config.json"
     
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return _load_config_cached(str(config_path), os.stat(config_path).st_mtime_ns)
 
 
 def get_supported_companies() -> list:
@@ -2,10 +2,10 @@
 import logging
 import time
 from pathlib import Path
-from pypdf import PdfReader
+import pypdfium2 as pdfium
 import re
-import json
-from bs4 import BeautifulSoup
+import orjson
+import lxml.html
 
 import pandas as pd
 
@@ -41,37 +41,57 @@ TARGET_HEADINGS_GENERIC = [
     r"sfatement of unaudiтed.*financial.*re5ulтs.*for тне quarter ended.*]une.*30,.*2025",
 ]
 
+# Each group compiled once into one alternation (one scan per group per page);
+# matched against the lower-cased page text
+_STANDALONE_HEADING_RE = re.compile("|".join(f"(?:{p})" for p in TARGET_HEADINGS_WITH_STANDALONE))
+_GENERIC_HEADING_RE = re.compile("|".join(f"(?:{p})" for p in TARGET_HEADINGS_GENERIC))
+
 def find_target_page(pdf_path: Path) -> int | None:
     """Return page index containing the Standalone (not Consolidated) Unaudited Q1/Q2 June 2025 results."""
-    reader = PdfReader(str(pdf_path))
-
-    for page_index, page in enumerate(reader.pages):
-        text = page.extract_text() or ""
-        text_lower = text.lower()
-
-        # First, try patterns that explicitly mention "standalone"
-        for pattern in TARGET_HEADINGS_WITH_STANDALONE:
-            if re.search(pattern, text_lower):
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        for page_index in range(len(pdf)):
+            page = pdf[page_index]
+            try:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range() or ""
+                textpage.close()
+            finally:
+                page.close()
+            text_lower = text.lower()
+
+            # Every heading pattern needs "2025" and "june" (or OCR'd "]une"); skip pages lacking them
+            if "2025" not in text_lower or ("june" not in text_lower and "]une" not in text_lower):
+                continue
+
+            # First, try patterns that explicitly mention "standalone"
+            if _STANDALONE_HEADING_RE.search(text_lower):
                 _log.info(f"Page {page_index + 1}: Found STANDALONE financial results (explicit)")
                 return page_index
 
-        # If no explicit standalone, check generic patterns
-        # but ONLY if the page does NOT contain "consolidated"
-        if "consolidated" not in text_lower:
-            for pattern in TARGET_HEADINGS_GENERIC:
-                if re.search(pattern, text_lower):
+            # If no explicit standalone, check generic patterns
+            # but ONLY if the page does NOT contain "consolidated"
+            if "consolidated" not in text_lower:
+                if _GENERIC_HEADING_RE.search(text_lower):
                     _log.info(f"Page {page_index + 1}: Found financial results (no consolidated keyword, assuming standalone)")
                     return page_index
-        else:
-            _log.info(f"Page {page_index + 1}: Skipping - contains 'consolidated' keyword")
+            else:
+                _log.info(f"Page {page_index + 1}: Skipping - contains 'consolidated' keyword")
+    finally:
+        pdf.close()
 
     return None
 
 # -------------------------------------------------------------------
 # PARSE HTML TABLE AND CREATE JSON
 # -------------------------------------------------------------------
-def parse_html_table_to_json(html_file_path: Path, company_name: str, config: dict) -> dict:
-    """Parse HTML table and create JSON output based on config."""
+def _cell_text(element) -> str:
+    """Text of an element with each text node stripped and joined (BeautifulSoup get_text(strip=True))."""
+    return "".join(text.strip() for text in element.itertext())
+
+
+def parse_html_table_to_json(html_file_path: Path, company_name: str, config: dict, html_content: str = None) -> dict:
+    """Parse HTML table and create JSON output based on config (html_content skips reading the file)."""
     
     # Map company name to config key
     company_mapping = {
@@ -97,21 +117,26 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
     # Get column layout
     column_layout_name = company_config.get("column_layout", "standard")
     column_layout = config["column_layouts"][column_layout_name]
+    # Resolved once for all items, 0-indexed
+    label_col_index = column_layout.get("label", 2) - 1
+    value_cols = [(date_key, col_index - 1) for date_key, col_index in column_layout.items() if date_key != "label"]
     
     # Read HTML file
-    with open(html_file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    if html_content is None:
+        with open(html_file_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
     
     # Parse HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
-    table = soup.find('table')
+    table = None
+    if html_content.strip():
+        table = next(lxml.html.fromstring(html_content).iter('table'), None)
     
-    if not table:
+    if table is None:
         _log.error("No table found in HTML file")
         return None
     
     # Extract all rows
-    rows = table.find_all('tr')
+    rows = list(table.iter('tr'))
     
     # Create result structure
     result = {
@@ -130,26 +155,21 @@ def parse_html_table_to_json(html_file_path: Path, company_name: str, config: di
             matched_row = rows[tr_number - 1]  # tr_number is 1-indexed
             
             # Extract values from the row based on column layout
-            cells = matched_row.find_all(['td', 'th'])
+            cells = list(matched_row.iter('td', 'th'))
             
             # Get the label from the label column
-            label_col_index = column_layout.get("label", 2) - 1  # Adjust for 0-indexing
             particular = ""
             if label_col_index < len(cells):
-                particular = cells[label_col_index].get_text(strip=True)
+                particular = _cell_text(cells[label_col_index])
             
             # If particular is empty, try to find it from the labels list
             if not particular:
                 particular = labels[0] if labels else key
             
             values = {}
-            for date_key, col_index in column_layout.items():
-                if date_key == "label":
-                    continue
-                
-                if col_index <= len(cells):
-                    value = cells[col_index - 1].get_text(strip=True)
-                    values[date_key] = value
+            for date_key, col_index in value_cols:
+                if col_index < len(cells):
+                    values[date_key] = _cell_text(cells[col_index])
                 else:
                     values[date_key] = ""
             
@@ -247,12 +267,14 @@ def main():
 
     doc_filename = conv_res.input.file.stem
 
-    # Export tables
+    # Export tables; exported HTML kept in memory for the JSON step
+    html_contents = []
     for table_ix, table in enumerate(conv_res.document.tables):
         table_df: pd.DataFrame = table.export_to_dataframe(doc=conv_res.document)
+        table_md = table_df.to_markdown()
 
         _log.info(f"## Extracted Table {table_ix}")
-        print(table_df.to_markdown())
+        print(table_md)
 
         # Save the table as CSV
         element_csv_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.csv"
@@ -263,15 +285,16 @@ def main():
         # Save the table as HTML
         element_html_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.html"
         _log.info(f"Saving HTML table to {element_html_filename}")
+        html_contents.append(table.export_to_html(doc=conv_res.document))
         with element_html_filename.open("w", encoding='utf-8') as fp:
-            fp.write(table.export_to_html(doc=conv_res.document))
+            fp.write(html_contents[-1])
         _log.info(f"Saved HTML table to {element_html_filename}")
 
         # Save the table as Markdown
         element_md_filename = output_dir / f"{doc_filename}-table-{table_ix + 1}.md"
         _log.info(f"Saving Markdown table to {element_md_filename}")
         with element_md_filename.open("w", encoding='utf-8') as fp:
-            fp.write(table_df.to_markdown())
+            fp.write(table_md)
         _log.info(f"Saved Markdown table to {element_md_filename}")
 
     # List with total time per document
@@ -281,30 +304,30 @@ def main():
 
     # Load config.json
     config_path = Path("config.json")
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    with open(config_path, 'rb') as f:
+        config = orjson.loads(f.read())
     
     # Parse the first HTML table and create JSON output
     html_filename = output_dir / f"{doc_filename}-table-1.html"
-    if html_filename.exists():
+    if html_contents:
         _log.info(f"\n📊 Parsing HTML table and creating JSON output...")
-        json_result = parse_html_table_to_json(html_filename, company_name, config)
+        json_result = parse_html_table_to_json(html_filename, company_name, config, html_content=html_contents[0])
         
         if json_result:
             # Print formatted JSON
             print("\n" + "="*80)
             print("FORMATTED JSON OUTPUT:")
             print("="*80)
-            print(json.dumps(json_result, indent=2, ensure_ascii=False))
+            print(orjson.dumps(json_result, option=orjson.OPT_INDENT_2).decode('utf-8'))
             print("="*80 + "\n")
             
             # Optionally save to file
             json_output_path = output_dir / f"{doc_filename}-financial-data.json"
-            with open(json_output_path, 'w', encoding='utf-8') as f:
-                json.dump(json_result, f, indent=2, ensure_ascii=False)
+            with open(json_output_path, 'wb') as f:
+                f.write(orjson.dumps(json_result, option=orjson.OPT_INDENT_2))
             _log.info(f"💾 Saved JSON output to {json_output_path}")
     else:
-        _log.warning(f"HTML file not found: {html_filename}")
+        _log.warning(f"No tables found in document: {conv_res.input.file.name}")
 
 
 if __name__ == "__main__":
@@ -37,9 +37,9 @@ exit /b 1
 
 :flask
 echo.
-echo Starting Flask API...
+echo Starting Flask API (waitress)...
 call venv\Scripts\activate.bat
-python app.py
+waitress-serve --threads=8 --port=5000 wsgi:app
 goto end
 
 :streamlit
@@ -53,7 +53,7 @@ goto end
 :both
 echo.
 echo Starting Flask API in a new window...
-start "Flask API" cmd /k "call venv\Scripts\activate.bat && python app.py"
+start "Flask API" cmd /k "call venv\Scripts\activate.bat && waitress-serve --threads=8 --port=5000 wsgi:app"
 timeout /t 3 /nobreak >nul
 echo.
 echo Starting Streamlit UI...
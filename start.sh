@@ -28,9 +28,9 @@ read -p "Enter your choice (1-4): " choice
 case $choice in
     1)
         echo ""
-        echo "Starting Flask API..."
+        echo "Starting Flask API (gunicorn)..."
         source venv/bin/activate
-        python app.py
+        gunicorn -c gunicorn.conf.py wsgi:app
         ;;
     2)
         echo ""
@@ -43,7 +43,7 @@ case $choice in
         echo ""
         echo "Starting Flask API in background..."
         source venv/bin/activate
-        python app.py &
+        gunicorn -c gunicorn.conf.py wsgi:app &
         API_PID=$!
         echo "Flask API started with PID: $API_PID"
         sleep 3
@@ -84,14 +84,18 @@ def check_api_health():
         return False
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_supported_companies():
+    """Fetch supported companies from API (cached; failures raise and are not cached)."""
+    response = requests.get(f"{API_URL}/api/companies", timeout=10)
+    response.raise_for_status()
+    return response.json().get('companies', [])
+
+
 def get_supported_companies():
     """Get list of supported companies from API."""
     try:
-        response = requests.get(f"{API_URL}/api/companies", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('companies', [])
-        return []
+        return _fetch_supported_companies()
     except:
         return []
 
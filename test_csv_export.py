@@ -0,0 +1,58 @@
+"""
+Round-trip tests for FinancialExcelGenerator.generate_csv: every field must
+read back unchanged with csv.reader, whatever quotes, commas or line breaks
+it contains. Run with pytest.
+"""
+import csv
+from io import StringIO
+
+from excel_generator import FinancialExcelGenerator
+
+
+class _QuotedLabelGenerator(FinancialExcelGenerator):
+    """Generator whose row labels need CSV quoting."""
+    ROW_SCHEMA = (
+        ('data', 'Sale of goods, "net"', 'sale_of_goods'),
+        ('total', 'Total "A", "B"', 'revenue_from_operations'),
+        ('label', 'Note:\nsee "annexure", page 2', None),
+        ('empty', None, None),
+    )
+
+
+def _generate(generator, json_data):
+    """generate_csv into memory, returning (raw text, rows read back by csv.reader)."""
+    buffer = StringIO(newline='')
+    assert generator.generate_csv(json_data, buffer)
+    text = buffer.getvalue()
+    return text, list(csv.reader(StringIO(text, newline='')))
+
+
+def test_csv_round_trip_quotes_and_commas():
+    """Labels, company name and comma-grouped values survive a csv.reader round trip."""
+    json_data = {
+        'company_name': 'Procter & Gamble "Hygiene", India',
+        'financial_data': [
+            {'key': 'sale_of_goods', 'values': {'30.06.2025': '1,234.50', '31.03.2025_Y': '(56.70)'}},
+        ],
+    }
+    text, rows = _generate(_QuotedLabelGenerator(), json_data)
+
+    assert len(rows) == 3 + len(_QuotedLabelGenerator.ROW_SCHEMA)
+    assert all(len(row) == 12 for row in rows)
+    assert rows[0][1] == json_data['company_name']
+    assert rows[3][0] == 'Sale of goods, "net"'
+    assert rows[3][1:3] == ['1,234.50', '(56.70)']
+    assert rows[4][0] == 'Total "A", "B"'
+    assert rows[4][1:] == ['-'] * 11
+    assert rows[5][0] == 'Note:\nsee "annexure", page 2'
+    assert rows[6] == [''] * 12
+    assert text.endswith('\r\n')
+
+
+def test_csv_matches_excel_layout():
+    """The default schema yields one CSV row per Excel row."""
+    generator = FinancialExcelGenerator()
+    _, rows = _generate(generator, {'company_name': 'ITC', 'financial_data': []})
+    assert len(rows) == 3 + len(generator.ROW_SCHEMA)
+    assert rows[1][0] == 'INR Crs'
+
@@ -14,8 +14,9 @@ def test_imports():
         ('streamlit', 'Streamlit'),
         ('docling', 'Docling'),
         ('pandas', 'Pandas'),
-        ('pypdf', 'PyPDF'),
+        ('pypdfium2', 'pypdfium2'),
         ('bs4', 'BeautifulSoup4'),
+        ('lxml', 'lxml'),
         ('easyocr', 'EasyOCR'),
     ]
     
@@ -0,0 +1,50 @@
+"""
+Tests for label-based row matching in parser_core (the fallback used when a
+config item has no tr_number). Run with pytest.
+"""
+import lxml.html
+
+from parser_core import _find_matching_row, _normalize_row_texts
+
+
+def _rows(*texts):
+    """Table rows with a label cell followed by two value cells."""
+    html = "<table>" + "".join(
+        f"<tr><td>{text}</td><td>1,234.50</td><td>(56.70)</td></tr>" for text in texts
+    ) + "</table>"
+    rows = list(lxml.html.fromstring(html).iter('tr'))
+    return rows, _normalize_row_texts(rows)
+
+
+def test_literal_match():
+    """A label contained in the row text matches without fuzzy scoring."""
+    rows, row_texts = _rows("Revenue from operations", "Other income", "Total income")
+    assert _find_matching_row(rows, row_texts, ["Other income"])[0] == 1
+
+
+def test_fuzzy_match_reworded_row():
+    """Slightly different wording still resolves to the right row."""
+    rows, row_texts = _rows("Total income", "Profit / (Loss) before tax", "Tax expense")
+    assert _find_matching_row(rows, row_texts, ["Profit before taxes"])[0] == 1
+
+
+def test_fuzzy_match_ignores_longer_near_duplicate():
+    """A longer row containing every label word is not a match on its own."""
+    rows, row_texts = _rows(
+        "Profit from discontinued operations before tax",
+        "Profit / (Loss) before tax",
+    )
+    assert _find_matching_row(rows, row_texts, ["Profit before tax"])[0] == 1
+
+    rows, row_texts = _rows("Total income", "Profit from discontinued operations before tax")
+    assert _find_matching_row(rows, row_texts, ["Profit before tax"]) == (-1, None)
+
+
+def test_fuzzy_match_rejects_ambiguous_rows():
+    """A label fitting two rows equally well matches neither."""
+    rows, row_texts = _rows("Total income", "Other expenses (net)")
+    assert _find_matching_row(rows, row_texts, ["Other expense net"])[0] == 1
+
+    rows, row_texts = _rows("Total income", "Other expenses (net)", "Other expenses (net)")
+    assert _find_matching_row(rows, row_texts, ["Other expense net"]) == (-1, None)
+
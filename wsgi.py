@@ -0,0 +1,9 @@
+"""
+WSGI entry point for running the Flask API under a production server.
+
+Linux/Mac:  gunicorn -c gunicorn.conf.py wsgi:app
+Windows:    waitress-serve --threads=8 --port=5000 wsgi:app
+"""
+from app import app
+
+__all__ = ['app']